@@ -2,10 +2,13 @@ import torch
 import os
 import random
 import numpy as np
-from collections import deque
-from gamePyglet import SnakeGame, Direction, Point, BLOCK_SIZE
-from model import Linear_QNet, QTrainer
-from helper import plot
+from gameHeadless import HeadlessSnakeGame, Direction, Point, BLOCK_SIZE
+from model import Linear_QNet, loadQNet, NumpyQNet, QValueCache, QTrainer
+from replayMemory import ReplayMemory, PrioritizedReplayMemory
+from featurizer import getState
+from checkpoint import Checkpointer
+from metrics import TrainingMetrics
+from profiler import NullProfiler
 
 MAX_MEM = 100_000
 BATCH_SIZE = 1000
@@ -16,35 +19,77 @@ LR_DECAY = 0.0
 RANDOMNESS = 100
 RAND_DECAY = 0.5
 
+# Prioritized replay
+PER_ALPHA = 0.6
+PER_BETA = 0.4
+PER_BETA_INCREMENT = 0.001
+
 class Agent:
     
-    def __init__(self, load_model:bool, model_filename) -> None:
+    def __init__(self, load_model:bool, model_filename, prioritized:bool = False, action_cache:bool = False,
+                 learning_rate:float = LEARN_RATE, batch_size:int = BATCH_SIZE, max_mem:int = MAX_MEM,
+                 randomness:float = RANDOMNESS, rand_decay:float = RAND_DECAY, gamma:float = 0.9,
+                 hidden_size:int = 256, seed:int = None) -> None:
         """Initializes the agent's default parameters
 
         Args:
             loaded_model (str, optional): File name for a model to load from the model/ dir. Defaults to None.
+            prioritized (bool, optional): Use prioritized experience replay for long memory training. Defaults to False.
+            action_cache (bool, optional): Pick moves from a table of Q values for every state, refreshed once per
+            training step. Pays off when the model trains rarely (e.g. evaluation runs). Defaults to False.
+            learning_rate (float, optional): optimizer learning rate. Defaults to LEARN_RATE.
+            batch_size (int, optional): transitions per long memory update. Defaults to BATCH_SIZE.
+            max_mem (int, optional): replay memory capacity. Defaults to MAX_MEM.
+            randomness (float, optional): starting epsilon (out of 200). Defaults to RANDOMNESS.
+            rand_decay (float, optional): epsilon decrease per game. Defaults to RAND_DECAY.
+            gamma (float, optional): discount rate (<1). Defaults to 0.9.
+            hidden_size (int, optional): hidden layer size of a new model (a loaded one keeps its own). Defaults to 256.
+            seed (int, optional): seed for the replay memory sampling. Defaults to None.
         """
         self.num_games = 0
         self.model_path = model_filename
         self.epsilon = 0 # randomness
-        self.gamma = 0.9 # discount rate (<1)
-        self.memory = deque(maxlen=MAX_MEM) # popLeft() when MAX_MEM exceeded
+        self.gamma = gamma # discount rate (<1)
+        self.batchSize = batch_size
+        self.randomness = randomness
+        self.randDecay = rand_decay
+        self.prioritized = prioritized
+        if prioritized:
+            self.memory = PrioritizedReplayMemory(max_mem, PER_ALPHA, PER_BETA, PER_BETA_INCREMENT, seed=seed)
+        else:
+            self.memory = ReplayMemory(max_mem, seed=seed) # overwrites oldest when max_mem exceeded
         
         self.randmove = 0 # num of rand moves (testing remove later)
         
         # Check if model should be loaded
         if load_model:
             self.model_path = './model/' + self.model_path
-            self.model = torch.load(self.model_path)
+            self.model = loadQNet(self.model_path)
             self.loaded_model = True
         else:
-            self.model = Linear_QNet(input_size=11, hidden_size=256, output_size=3, model_filename=self.model_path)
+            self.model = Linear_QNet(input_size=11, hidden_size=hidden_size, output_size=3, model_filename=self.model_path)
             self.loaded_model = False
         # Create trainer
-        self.trainer = QTrainer(self.model, LEARN_RATE, self.gamma)
+        self.trainer = QTrainer(self.model, learning_rate, self.gamma)
+        
+        # NumPy copy of the model (or table of every state's Q values) for picking moves,
+        # synced lazily after training steps
+        self.policy = QValueCache(self.model) if action_cache else NumpyQNet(self.model)
+        self.policyVersion = self.trainer.updates
     
     def getState(self, game):
-        """Gets the game's current state
+        """Gets the game's current state (table-driven, see featurizer.getState)
+
+        Args:
+            game (HeadlessSnakeGame): The instance of the snake game that will be analyzed
+
+        Returns:
+            array of uint8 (11,): state array, same layout as getStateReference
+        """
+        return getState(game)
+    
+    def getStateReference(self, game):
+        """Gets the game's current state. Original implementation, kept as a reference for featurizer
 
         Args:
             game (Game): The instance of the snake game that will be analyzed
@@ -112,28 +157,28 @@ class Agent:
 
         Args:
             state (state array): the current state of the game
-            action ([int, int, int]): the action took this step
+            action (int): the action took this step [0=straight, 1=right, 2=left]
             reward (int): the reward for the action of this step
             next_state (state array): the next state of the game
             game_over (bool): whether or not the game ended
         """
-        # Store all parameters as one tuple in the memory
-        self.memory.append((state, action, reward, next_state, game_over)) # pops left if max mem is exceeded
+        # Store all parameters in the memory arrays
+        self.memory.append(state, action, reward, next_state, game_over) # overwrites oldest if max mem is exceeded
     
     def trainLongMem(self):
         """Trains the model after game over. Uses a batch of memory rather than just one step
         """
-        if len(self.memory) > BATCH_SIZE:
-            # Generate a random batch of memory samples
-            miniSample = random.sample(self.memory, BATCH_SIZE) 
-        else:
-            # Use whole memory if not enough samples for full batch
-            miniSample = self.memory
+        if self.prioritized:
+            # Sample by priority, then refresh the priorities from the new TD errors
+            states, actions, rewards, next_states, game_overs, indices, weights = self.memory.sample(self.batchSize)
+            tdErrors = self.trainer.trainStep(states, actions, rewards, next_states, game_overs, weights)
+            self.memory.updatePriorities(indices, tdErrors.numpy())
+            return
         
-        # Unpack all the states, actions, rewards, etc. from miniSample, and repack
-        # in groups using built in zip function
-        states, actions, rewards, next_states, game_overs = zip(*miniSample)
-        # Pass the new packages to the trainer
+        # Generate a random batch of memory samples as tensors
+        # (uses whole memory if not enough samples for full batch)
+        states, actions, rewards, next_states, game_overs = self.memory.sample(self.batchSize)
+        # Pass the batch to the trainer
         self.trainer.trainStep(states, actions, rewards, next_states, game_overs)
     
     def trainShortMem(self, state, action, reward, next_state, game_over):
@@ -141,7 +186,7 @@ class Agent:
 
         Args:
             state (state array): the current state of the game
-            action ([int, int, int]): the action took this step
+            action (int): the action took this step [0=straight, 1=right, 2=left]
             reward (int): the reward for the action of this step
             next_state (state array): the next state of the game
             game_over (bool): whether or not the game ended
@@ -156,45 +201,43 @@ class Agent:
             state (state array): the current state of the game
 
         Returns:
-            [int, int, int]: The action to be performed this step
+            int: The action to be performed this step [0=straight, 1=right, 2=left]
         """
         # random moves: tradeoff exploration / exploitation
         # Random moves when still exploring/learning. (exploration)
         # Less random moves as the model gets better and better. (exploitation)
         
-        self.epsilon = RANDOMNESS - self.num_games * RAND_DECAY
+        self.epsilon = self.randomness - self.num_games * self.randDecay
         
-        nextMove = [0, 0, 0]
         # As num games increases, if statement will be True less
         # If true, does random move
         if random.randint(0, 200) < self.epsilon:
             self.randmove += 1
             move = random.randint(0, 2)
-            nextMove[move] = 1
-        # If False, does predicted move from model
+        # If False, does predicted move from model (NumPy copy or cache, refreshed if the model trained since)
         else:
-            state0 = torch.tensor(state, dtype=torch.float) # converts state array to torch tensor object
-            prediction = self.model(state0) # calls the model's forward function (gets model's prediction)
-            move = torch.argmax(prediction).item() 
-            nextMove[move] = 1
+            if self.policyVersion != self.trainer.updates:
+                self.policy.refresh()
+                self.policyVersion = self.trainer.updates
+            move = self.policy.act(state)
         
-        return nextMove
+        return move
         
     # POSSIBLY REMOVE
     def _calcualteEpsilon(self) -> int:
         
-        epsilon = RANDOMNESS
+        epsilon = self.randomness
         
         # Calculate any decreases for epsilon (randomness)
         decrease_epsilon = self.num_games
         if self.loaded_model: 
-            decrease_epsilon += RANDOMNESS
+            decrease_epsilon += self.randomness
         
         # Increases randomness as model stops improving
         increase_epsilon = self.numGamesUnimproved
         # Limit the dynamic randomness
-        if increase_epsilon > RANDOMNESS * 0.01:
-            increase_epsilon = RANDOMNESS * 0.01
+        if increase_epsilon > self.randomness * 0.01:
+            increase_epsilon = self.randomness * 0.01
         
         if decrease_epsilon < epsilon:
             epsilon -= decrease_epsilon
@@ -207,70 +250,136 @@ class Agent:
         
 class AgentTrainer():
     
-    def __init__(self, agent:Agent, game:SnakeGame, path:str = None) -> None:
+    def __init__(self, agent:Agent, game:HeadlessSnakeGame, path:str = None,
+                 train_every:int = 0, updates_per_train:int = 1, warmup:int = 0, short_mem:bool = True,
+                 checkpointer:Checkpointer = None, dashboard = None, metrics:TrainingMetrics = None,
+                 profiler = None) -> None:
         """Initializes an agent trainer, which takes an agent and trains its model.
+        The defaults train like the original loop: a single step update every frame
+        and a long memory update on game over.
 
         Args:
             agent (Agent): Agent in which the model will be trained
-            game (SnakeGame): Game where the agent is learning to play
+            game (HeadlessSnakeGame): Game where the agent is learning to play (gamePyglet.SnakeGame to watch it)
+            train_every (int, optional): env steps between long memory updates, 0 for game over only. Defaults to 0.
+            updates_per_train (int, optional): long memory updates (batches) per train call. Defaults to 1.
+            warmup (int, optional): env steps played before any training starts. Defaults to 0.
+            short_mem (bool, optional): do the single step update every frame. Defaults to True.
+            checkpointer (Checkpointer, optional): saves the model in the background. Defaults to one
+            saving to path (or model.pth) on every new record and on close().
+            dashboard (helper.LiveDashboard, optional): live score plot, updated every game. Defaults to None.
+            metrics (TrainingMetrics, optional): score/loss stats and periodic summaries. Defaults to one
+            printing a summary every 10 seconds.
+            profiler (profiler.PhaseProfiler, optional): times each phase of train(). Defaults to None (off).
         """
         # Init Variables for the Trainer
         self.agent = agent
         self.game = game 
         self.model_path = path # Specifies a model to save to from the model/ directory
-        self.plotScores = []
-        self.plotMeanScores = []
-        self.totalScore = 0
-        self.record = 0
+        self.checkpointer = checkpointer or Checkpointer(path or 'model.pth')
+        self.dashboard = dashboard
+        
+        # Training cadence
+        self.trainEvery = train_every
+        self.updatesPerTrain = updates_per_train
+        self.warmup = warmup
+        self.shortMem = short_mem
+        self.steps = 0 # env steps played
+        
+        # Bounded stats (record and total score live there too)
+        self.metrics = metrics or TrainingMetrics()
+        self.profiler = profiler or NullProfiler()
+    
+    @property
+    def record(self):
+        return self.metrics.record
+    
+    @record.setter
+    def record(self, value):
+        self.metrics.record = value
+    
+    @property
+    def totalScore(self):
+        return self.metrics.totalScore
+    
+    @totalScore.setter
+    def totalScore(self, value):
+        self.metrics.totalScore = value
         
     def train(self):
         """ Trains the agent and model for the current frame
         """
-        
+        profiler = self.profiler
+        profiler.startStep()
 
         # get old state
         oldState = self.agent.getState(self.game)
+        profiler.lap('getState')
         
         # get the next move based on the state
         nextMove = self.agent.getAction(oldState)
+        profiler.lap('getAction')
         
         # perform the move and get the new game state
         reward, gameOver, score = self.game.playStep(nextMove) 
+        profiler.lap('playStep')
         newState = self.agent.getState(self.game)
+        profiler.lap('getState')
+        self.steps += 1
+        learning = self.steps > self.warmup
         
         # train short mem (1 step)
-        self.agent.trainShortMem(oldState, nextMove, reward, newState, gameOver)
+        if learning and self.shortMem:
+            self.agent.trainShortMem(oldState, nextMove, reward, newState, gameOver)
+            profiler.lap('trainShortMem')
         
         # remember
         self.agent.remember(oldState, nextMove, reward, newState, gameOver)
+        profiler.lap('remember')
+        
+        # train long mem every few steps
+        if learning and self.trainEvery and self.steps % self.trainEvery == 0:
+            for _ in range(self.updatesPerTrain):
+                self.agent.trainLongMem()
+            profiler.lap('trainLongMem')
         
         if gameOver:
             # train long memory and plot results of game
             self.game.reset()
             self.agent.num_games += 1
-            self.agent.trainLongMem()
-            
-            # automaticall save the model as it gets better scores
-            # also manages the dynamic randomness
-            if score > self.record:
-                record = score
-                
-                if self.model_path:
-                    self.agent.model.save(self.model_path)
-                else:
-                    self.agent.model.save()
+            profiler.lap('reset')
+            if learning:
+                for _ in range(self.updatesPerTrain):
+                    self.agent.trainLongMem()
+                profiler.lap('trainLongMem')
             
-            
-            # plot results in pyplot (only working n pycharm)
-            self.plotScores.append(score)
-            self.totalScore += score
-            meanScore = self.totalScore / self.agent.num_games
-            self.plotMeanScores.append(meanScore)
-            
-            print('Game', self.agent.num_games, 'Score', score, 'Record:', self.record, 'Average:', meanScore, 'Epsi:', self.agent.epsilon, "Rands:", self.agent.randmove)\
+            # stats and plot (summaries are printed every few seconds, the dashboard draws in its own process)
+            # Done before the checkpoint so the saved record/total score include this game
+            newRecord = score > self.record
+            lastLoss = getattr(getattr(self.agent, 'trainer', None), 'lastLoss', None) # the tabular agent has no loss
+            self.metrics.onGame(score, self.agent.num_games, self.steps, self.agent.randmove,
+                                None if lastLoss is None else float(lastLoss))
             #reset the rand move
             self.agent.randmove = 0
-            # plot(plotScores, plotMeanScores)
+            if self.dashboard:
+                self.dashboard.update(score, self.totalScore / self.agent.num_games)
+            profiler.lap('metrics')
+            
+            # automaticall save the model as it gets better scores (written in the background)
+            self.checkpointer.onGameOver(self, newRecord)
+            profiler.lap('checkpoint')
+        
+        profiler.endStep()
+    
+    def close(self):
+        """Saves the last checkpoint/snapshot (if the checkpointer saves on exit), waits for pending writes,
+        flushes the metrics and writes the profile
+        """
+        self.checkpointer.close(self)
+        self.metrics.close()
+        self.profiler.close()
+        if self.dashboard:
+            self.dashboard.close()
 
     # Print out model data-----------------------REMOVE LATER
     # for param_tensor in agent.model.state_dict():
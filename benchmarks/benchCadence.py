@@ -0,0 +1,78 @@
+import os
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+import torch
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR) # so "python benchmarks/<file>.py" finds the repo's modules, like "python -m benchmarks.<file>"
+from agent import Agent, AgentTrainer
+from gameHeadless import HeadlessSnakeGame
+from metrics import TrainingMetrics
+
+# name: AgentTrainer cadence arguments
+SCHEDULES = {
+    'every frame (original)': dict(),
+    'every 4, x1': dict(train_every=4, warmup=1000, short_mem=False),
+    'every 16, x1': dict(train_every=16, warmup=1000, short_mem=False),
+    'every 16, x4': dict(train_every=16, updates_per_train=4, warmup=1000, short_mem=False),
+    'every 64, x1 + short mem': dict(train_every=64, warmup=1000),
+}
+
+
+def benchSchedule(schedule, seconds=60, target_score=5.0, window=20, seed=0):
+    """Trains a fresh agent with one schedule for a fixed wall-clock budget
+
+    Args:
+        schedule (dict): AgentTrainer cadence arguments
+        seconds (float, optional): time budget. Defaults to 60.
+        target_score (float, optional): mean score (over the last window games) to reach. Defaults to 5.0.
+        window (int, optional): games in the rolling mean. Defaults to 20.
+        seed (int, optional): seed for the game, agent and model. Defaults to 0.
+
+    Returns:
+        dict: env steps/s, games played, final rolling mean and seconds to reach target_score (None if never)
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+    agent = Agent(False, 'bench.pth')
+    trainer = AgentTrainer(agent, HeadlessSnakeGame(), 'bench.pth', **schedule,
+                           metrics=TrainingMetrics(window, verbose=False))
+    scores = trainer.metrics.scores
+
+    timeToTarget = None
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        games = agent.num_games
+        trainer.train()
+        if agent.num_games > games and timeToTarget is None and len(scores) >= window:
+            if scores.mean() >= target_score:
+                timeToTarget = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    trainer.close() # waits for the checkpoint writes and stops the writer thread
+
+    return {
+        'steps/s': trainer.steps / elapsed,
+        'games': agent.num_games,
+        'mean score': scores.mean(),
+        'time to target': timeToTarget
+    }
+
+
+if __name__ == "__main__":
+
+    # Keep the checkpoints written while training out of the repo's model/ dir
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        try:
+            print('Schedule', '|', 'Steps/s', '|', 'Games', '|', 'Mean score', '|', 'Seconds to target')
+            for name, schedule in SCHEDULES.items():
+                result = benchSchedule(schedule)
+                print(name, '|', round(result['steps/s']), '|', result['games'], '|',
+                      round(result['mean score'], 2), '|', result['time to target'] and round(result['time to target'], 1))
+        finally:
+            os.chdir(cwd)
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # no window needed
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR) # so "python benchmarks/<file>.py" finds the repo's modules, like "python -m benchmarks.<file>"
+from game import Game, Point, BLOCK_SIZE
+from benchmarks.benchSuite import serpentineBody, loopingGame
+
+
+def benchCollision(game, length, frames=2000):
+    """Times the collision work of one agent frame (the head check plus the
+    12 danger checks made by Agent.getState) for a snake of the given length
+
+    Returns:
+        float: microseconds per frame
+    """
+    game.snakeBody = serpentineBody(game, length)
+    game.snakeHead = game.snakeBody[0]
+    game._buildOccupancy()
+
+    head = game.snakeHead
+    neighbours = [
+        Point(head.x - BLOCK_SIZE, head.y),
+        Point(head.x + BLOCK_SIZE, head.y),
+        Point(head.x, head.y + BLOCK_SIZE),
+        Point(head.x, head.y - BLOCK_SIZE)
+    ] * 3
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        game.find_collision()
+        for pt in neighbours:
+            game.find_collision(pt)
+    return (time.perf_counter() - start) / frames * 1e6
+
+
+def benchStep(width, height, length, steps=5000, repeats=5):
+    """Times whole playStep calls (move, occupancy update, collision check) of a headless
+    game whose snake of the given length loops around the board without dying or growing.
+    Game.playStep runs the same engine but also draws every segment, which would swamp it
+
+    Returns:
+        float: best microseconds per step
+    """
+    game, actions = loopingGame(width, height, length)
+    lap = len(actions)
+    best = float('inf')
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        for step in range(repeat * steps, (repeat + 1) * steps):
+            game.playStep(actions[step % lap])
+        best = min(best, (time.perf_counter() - start) / steps)
+    assert len(game.snakeBody) == length and not game.find_collision()
+    return best * 1e6
+
+
+if __name__ == "__main__":
+
+    game = Game()
+    fullBoard = game.gridWidth * game.gridHeight - 1
+
+    print('Length', '|', 'Collision us/frame', '|', 'playStep us/step')
+    for length in [3, 10, 50, 100, fullBoard // 4, fullBoard // 2, fullBoard]:
+        print(length, '|', round(benchCollision(game, length), 2), '|',
+              round(benchStep(game.SCREEN_WIDTH, game.SCREEN_HEIGHT, length), 2))
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules timed, plus matplotlib.pyplot for scale (what importing agent used to pull in)
+MODULES = ['model', 'gameHeadless', 'gameNumpy', 'game', 'gamePyglet', 'agent', 'helper', 'matplotlib.pyplot']
+
+# Runs in a fresh interpreter: import time in seconds, and whether the plotting stack got loaded
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start, 'matplotlib.pyplot' in sys.modules, 'IPython' in sys.modules)
+"""
+
+
+def benchImport(module, repeats=5):
+    """Cold import time of a module, each try in a new Python process
+
+    Args:
+        module (str): module to import
+        repeats (int, optional): number of processes, the best is kept. Defaults to 5.
+
+    Returns:
+        dict: best seconds and whether matplotlib / IPython were imported (None if the import failed)
+    """
+    best = None
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-c', _PROBE.format(module=module)],
+                                cwd=REPO_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            return {'seconds': None, 'matplotlib': None, 'IPython': None}
+
+        seconds, matplotlib, ipython = result.stdout.split()[-3:]
+        if best is None or float(seconds) < best['seconds']:
+            best = {'seconds': float(seconds), 'matplotlib': matplotlib == 'True', 'IPython': ipython == 'True'}
+    return best
+
+
+if __name__ == "__main__":
+
+    print('Module', '|', 'Import ms', '|', 'matplotlib', '|', 'IPython')
+    for module in MODULES:
+        result = benchImport(module)
+        if result['seconds'] is None:
+            print(module, '|', 'failed to import')
+        else:
+            print(module, '|', round(result['seconds'] * 1000, 1), '|', result['matplotlib'], '|', result['IPython'])
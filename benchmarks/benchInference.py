@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import numpy as np
+import torch
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR) # so "python benchmarks/<file>.py" finds the repo's modules, like "python -m benchmarks.<file>"
+from model import Linear_QNet, NumpyQNet, QValueCache
+
+
+def timePerCall(function, states, repeats=5):
+    """Best time per call (microseconds) of function over all states
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for state in states:
+            function(state)
+        best = min(best, (time.perf_counter() - start) / len(states))
+    return best * 1e6
+
+
+def benchInference(num_states=5000, seed=0):
+    """Per-action latency of the original torch path against the NumPy inference copy
+    and the Q value cache (plus the cost of one cache refresh)
+
+    Returns:
+        dict[str, float]: microseconds per action for each path
+    """
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+    states = rng.integers(0, 2, size=(num_states, 11)).astype(np.uint8)
+
+    model = Linear_QNet(input_size=11, hidden_size=256, output_size=3)
+    policy = NumpyQNet(model)
+    cache = QValueCache(model)
+
+    def torchAutograd(state):
+        # Original Agent.getAction path
+        return torch.argmax(model(torch.tensor(state, dtype=torch.float))).item()
+
+    def torchNoGrad(state):
+        with torch.no_grad():
+            return torch.argmax(model(torch.from_numpy(state).float())).item()
+
+    # Both paths must agree
+    for state in states[:100]:
+        assert torchAutograd(state) == policy.act(state) == cache.act(state)
+
+    return {
+        'torch autograd': timePerCall(torchAutograd, states),
+        'torch no_grad': timePerCall(torchNoGrad, states),
+        'numpy': timePerCall(policy.act, states),
+        'q cache': timePerCall(cache.act, states),
+        'q cache refresh': timePerCall(lambda _: cache.refresh(), states[:200])
+    }
+
+
+if __name__ == "__main__":
+
+    torch.set_num_threads(1)
+    for path, latency in benchInference().items():
+        print(path, round(latency, 2), 'us')
@@ -0,0 +1,397 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import traceback
+from collections import deque
+import numpy as np
+import torch
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR) # so "python benchmarks/<file>.py" finds the repo's modules, like "python -m benchmarks.<file>"
+from gameHeadless import HeadlessSnakeGame, Direction, Point, TURNS, BLOCK_SIZE
+from featurizer import getState
+from replayMemory import ReplayMemory, PrioritizedReplayMemory
+from model import Linear_QNet, QTrainer
+
+SEED = 0
+
+# Boards (px) for the engine benchmarks, grid heights are even so the snake can loop forever
+BOARDS = [(400, 320), (800, 600), (1600, 1200)]
+# Snake lengths as a fraction of the board (3 segments minimum)
+LENGTH_FRACTIONS = [0.0, 0.25, 0.5, 0.9]
+BATCH_SIZES = [32, 256, 1000, 4096]
+
+# Relative slowdown flagged as a regression: single runs of the small benchmarks differ by up
+# to ~25% back to back on a shared machine, use --repeats to tighten it
+TOLERANCE = 0.3
+
+# Groups run by default ('imports' spawns many interpreters and is noisy, so only on request)
+DEFAULT_GROUPS = ['engine', 'featurizer', 'replay', 'trainer', 'loop', 'inference', 'collision']
+
+# Moves from one cell to the next
+STEP_DIRECTIONS = {(1, 0): Direction.EAST, (-1, 0): Direction.WEST, (0, 1): Direction.NORTH, (0, -1): Direction.SOUTH}
+
+
+def serpentineBody(game, length):
+    """Lays a snake of the given length across the board, row by row
+
+    Args:
+        game (HeadlessSnakeGame): game the snake is placed in (game.Game works too)
+        length (int): number of segments
+
+    Returns:
+        deque[Point]: snake body, head first
+    """
+    path = []
+    for row in range(game.gridHeight):
+        columns = range(game.gridWidth) if row % 2 == 0 else reversed(range(game.gridWidth))
+        for column in columns:
+            path.append(Point(column * BLOCK_SIZE, row * BLOCK_SIZE))
+    return deque(reversed(path[:length]))
+
+
+def hamiltonianCycle(width, height):
+    """A closed path through every cell: serpentine over columns 1.. and back down column 0
+
+    Args:
+        width, height (int): grid size in cells (height must be even)
+
+    Returns:
+        list[(int, int)]: cells in order
+    """
+    cycle = []
+    for row in range(height):
+        columns = range(1, width) if row % 2 == 0 else range(width - 1, 0, -1)
+        cycle.extend((column, row) for column in columns)
+    cycle.extend((0, row) for row in range(height - 1, -1, -1))
+    return cycle
+
+
+def loopingGame(width, height, length):
+    """A game whose snake (of a fixed length) can follow a Hamiltonian cycle forever.
+    The fruit is parked off the board so the snake never grows
+
+    Returns:
+        (HeadlessSnakeGame, list[int]): the game and the actions for one lap of the cycle
+    """
+    game = HeadlessSnakeGame(width, height)
+    cycle = hamiltonianCycle(game.gridWidth, game.gridHeight)
+
+    # Body on the first cells of the cycle, head last
+    game.snakeBody = deque(Point(x * BLOCK_SIZE, y * BLOCK_SIZE) for x, y in reversed(cycle[:length]))
+    game.snakeHead = game.snakeBody[0]
+    game._buildOccupancy()
+    game.fruit = Point(-BLOCK_SIZE, -BLOCK_SIZE)
+    game.frameIteration = -sys.maxsize # never time out
+
+    (x0, y0), (x1, y1) = cycle[length - 2], cycle[length - 1]
+    game.direction = game.changeDirection = STEP_DIRECTIONS[(x1 - x0, y1 - y0)]
+
+    # Relative action for every move of one lap
+    actions = []
+    direction = game.direction
+    for step in range(len(cycle)):
+        (x0, y0), (x1, y1) = cycle[(length - 1 + step) % len(cycle)], cycle[(length + step) % len(cycle)]
+        nextDirection = STEP_DIRECTIONS[(x1 - x0, y1 - y0)]
+        actions.append(TURNS[direction].index(nextDirection))
+        direction = nextDirection
+    return game, actions
+
+
+def bestTime(function, calls, repeats=5):
+    """Best seconds per call of function() over a few repeats
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def seedEverything(seed=SEED):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+## Benchmark groups, each returns {name: (value, unit, higher is better)} ##
+
+def benchEngine(steps=5000, repeats=5):
+    """playStep throughput (steps/s) per board size and snake length
+    """
+    results = {}
+    for width, height in BOARDS:
+        for fraction in LENGTH_FRACTIONS:
+            seedEverything()
+            cells = (width // BLOCK_SIZE) * (height // BLOCK_SIZE)
+            length = max(3, int(cells * fraction))
+            game, actions = loopingGame(width, height, length)
+
+            lap = len(actions)
+            elapsed = float('inf')
+            for repeat in range(repeats):
+                start = time.perf_counter()
+                for step in range(repeat * steps, (repeat + 1) * steps):
+                    game.playStep(actions[step % lap])
+                elapsed = min(elapsed, time.perf_counter() - start)
+            assert len(game.snakeBody) == length and not game.find_collision()
+
+            results['playStep/' + str(width // BLOCK_SIZE) + 'x' + str(height // BLOCK_SIZE) + '/len=' + str(length)] = \
+                (steps / elapsed, 'steps/s', True)
+    return results
+
+
+def benchFeaturizer(calls=20000):
+    """getState cost (us) for a short and a long snake
+    """
+    results = {}
+    for fraction in [0.0, 0.5]:
+        seedEverything()
+        game = HeadlessSnakeGame()
+        length = max(3, int(game.gridWidth * game.gridHeight * fraction))
+        game.snakeBody = serpentineBody(game, length)
+        game.snakeHead = game.snakeBody[0]
+        game._buildOccupancy()
+        results['getState/len=' + str(length)] = (bestTime(lambda: getState(game), calls) * 1e6, 'us', False)
+    return results
+
+
+def benchReplay(capacity=100_000, calls=500):
+    """Replay sampling cost (us per batch) for uniform and prioritized memories
+    """
+    rng = np.random.default_rng(SEED)
+    transitions = (
+        rng.integers(0, 2, size=(capacity, 11)).astype(np.uint8),
+        rng.integers(0, 3, size=capacity).astype(np.int8),
+        rng.choice([-10.0, 0.0, 10.0], size=capacity).astype(np.float32),
+        rng.integers(0, 2, size=(capacity, 11)).astype(np.uint8),
+        rng.random(capacity) < 0.01
+    )
+
+    results = {}
+    for name, memory in [('uniform', ReplayMemory(capacity, seed=SEED)), ('prioritized', PrioritizedReplayMemory(capacity, seed=SEED))]:
+        memory.appendBatch(*transitions)
+        for batchSize in BATCH_SIZES:
+            results['sample/' + name + '/batch=' + str(batchSize)] = \
+                (bestTime(lambda: memory.sample(batchSize), calls) * 1e6, 'us', False)
+    return results
+
+
+def benchTrainer(calls=200):
+    """QTrainer.trainStep latency (us) for one transition and a batch of 1000
+    """
+    seedEverything()
+    model = Linear_QNet(11, 256, 3)
+    trainer = QTrainer(model, 0.001, 0.9)
+
+    memory = ReplayMemory(10_000, seed=SEED)
+    rng = np.random.default_rng(SEED)
+    memory.appendBatch(rng.integers(0, 2, size=(10_000, 11)), rng.integers(0, 3, size=10_000),
+                       rng.choice([-10.0, 0.0, 10.0], size=10_000), rng.integers(0, 2, size=(10_000, 11)),
+                       rng.random(10_000) < 0.01)
+    state, nextState = memory.states[0].copy(), memory.nextStates[0].copy()
+    batch = tuple(tensor.clone() for tensor in memory.sample(1000))
+
+    return {
+        'trainStep/batch=1': (bestTime(lambda: trainer.trainStep(state, 1, 0.0, nextState, False), calls * 10) * 1e6, 'us', False),
+        'trainStep/batch=1000': (bestTime(lambda: trainer.trainStep(*batch), calls) * 1e6, 'us', False)
+    }
+
+
+def benchLoop(steps=20000):
+    """End-to-end env steps/s of AgentTrainer.train, with the original schedule and a batched one
+    """
+    # Imported here: agent pulls in the checkpoint writer thread
+    from agent import Agent, AgentTrainer
+    from checkpoint import Checkpointer
+    from metrics import TrainingMetrics
+
+    schedules = {
+        'every frame': dict(),
+        'every 16': dict(train_every=16, warmup=1000, short_mem=False)
+    }
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder) # checkpoints stay out of the repo
+        trainer = None
+        try:
+            for name, schedule in schedules.items():
+                seedEverything()
+                agent = Agent(False, 'bench.pth')
+                trainer = AgentTrainer(agent, HeadlessSnakeGame(), 'bench.pth', **schedule,
+                                       checkpointer=Checkpointer('bench.pth', on_record=False, on_exit=False),
+                                       metrics=TrainingMetrics(verbose=False))
+                start = time.perf_counter()
+                for _ in range(steps):
+                    trainer.train()
+                results['loop/' + name] = (steps / (time.perf_counter() - start), 'steps/s', True)
+                trainer.close()
+                trainer = None
+        finally:
+            if trainer is not None:
+                trainer.close()
+            os.chdir(cwd)
+    return results
+
+
+def benchInferenceGroup():
+    from benchmarks.benchInference import benchInference
+    return {'inference/' + path: (latency, 'us', False) for path, latency in benchInference(seed=SEED).items()}
+
+
+def benchCollisionGroup():
+    from benchmarks.benchCollision import Game, benchCollision
+    cwd = os.getcwd()
+    os.chdir(REPO_DIR) # Game loads its font relative to the cwd
+    try:
+        game = Game(fps=None)
+    finally:
+        os.chdir(cwd)
+    fullBoard = game.gridWidth * game.gridHeight - 1
+    return {'collision/len=' + str(length): (benchCollision(game, length), 'us', False)
+            for length in [3, fullBoard // 2, fullBoard]}
+
+
+def benchImportsGroup():
+    from benchmarks.benchImports import MODULES, benchImport
+    results = {}
+    for module in MODULES:
+        seconds = benchImport(module)['seconds']
+        if seconds is not None:
+            results['import/' + module] = (seconds * 1000, 'ms', False)
+    return results
+
+
+GROUPS = {
+    'engine': benchEngine,
+    'featurizer': benchFeaturizer,
+    'replay': benchReplay,
+    'trainer': benchTrainer,
+    'loop': benchLoop,
+    'inference': benchInferenceGroup,
+    'collision': benchCollisionGroup,
+    'imports': benchImportsGroup
+}
+
+
+def runSuite(groups=DEFAULT_GROUPS, out=None, repeats=1):
+    """Runs the benchmark groups. A group that raises is reported and skipped, the others still run
+
+    Args:
+        groups (list[str], optional): group names from GROUPS. Defaults to DEFAULT_GROUPS.
+        out (str, optional): JSON file rewritten after every group, so a crash keeps what was measured. Defaults to None.
+        repeats (int, optional): runs of each group, the best value of each benchmark is kept
+        (cuts the run to run noise of a shared machine). Defaults to 1.
+
+    Returns:
+        dict: 'meta' (versions, threads, seed, failed groups) and 'results' (name -> value, unit, higherIsBetter)
+    """
+    torch.set_num_threads(1) # steadier numbers, and the training loop runs single threaded anyway
+    suite = {'meta': _meta(groups, repeats), 'results': {}}
+    results = suite['results']
+    for group in groups:
+        try:
+            for _ in range(repeats):
+                for name, (value, unit, higherIsBetter) in GROUPS[group]().items():
+                    best = results.get(name)
+                    if best is None or (value > best['value'] if higherIsBetter else value < best['value']):
+                        results[name] = {'value': value, 'unit': unit, 'higherIsBetter': higherIsBetter}
+                    print(name, round(value, 2), unit, flush=True)
+        except Exception:
+            print('Group', group, 'failed:')
+            traceback.print_exc()
+            suite['meta']['failed'].append(group)
+
+        if out:
+            with open(out, 'w') as file:
+                json.dump(suite, file, indent=1)
+    return suite
+
+
+
+def compareResults(current, baseline, tolerance=TOLERANCE):
+    """Compares two suite outputs
+
+    Args:
+        current (dict): output of runSuite
+        baseline (dict): stored output of runSuite
+        tolerance (float, optional): relative slowdown allowed before flagging. Defaults to TOLERANCE.
+
+    Returns:
+        list[dict]: one row per benchmark with its status: 'compared' (in both, with the change,
+        positive = better, and a regression flag), 'missing' (baseline only) or 'new' (current only)
+    """
+    rows = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            rows.append({'name': name, 'baseline': None, 'current': result['value'], 'unit': result['unit'],
+                         'change': None, 'regression': False, 'status': 'new'})
+            continue
+        old = baseline['results'][name]['value']
+        new = result['value']
+        # Relative improvement, whatever the unit's direction
+        change = (new - old) / old if result['higherIsBetter'] else (old - new) / old
+        rows.append({'name': name, 'baseline': old, 'current': new, 'unit': result['unit'],
+                     'change': change, 'regression': change < -tolerance, 'status': 'compared'})
+
+    for name, result in baseline['results'].items():
+        if name not in current['results']:
+            rows.append({'name': name, 'baseline': result['value'], 'current': None, 'unit': result['unit'],
+                         'change': None, 'regression': False, 'status': 'missing'})
+    return rows
+
+
+## PRIVATE ##
+
+def _meta(groups, repeats):
+    return {
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'torch': torch.__version__,
+        'platform': platform.platform(),
+        'threads': torch.get_num_threads(),
+        'seed': SEED,
+        'groups': list(groups),
+        'repeats': repeats,
+        'failed': []
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Run the SnakeAI benchmark suite')
+    parser.add_argument('--groups', nargs='+', choices=list(GROUPS), default=DEFAULT_GROUPS, help='groups to run')
+    parser.add_argument('--out', default=None, help='write the results as JSON here')
+    parser.add_argument('--compare', default=None, help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='relative slowdown flagged as a regression')
+    parser.add_argument('--repeats', type=int, default=1, help='runs of each group, the best value is kept')
+    args = parser.parse_args()
+
+    current = runSuite(args.groups, args.out, args.repeats)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        rows = compareResults(current, baseline, args.tolerance)
+
+        print('Benchmark', '|', 'Baseline', '|', 'Current', '|', 'Change %', '|', '')
+        for row in rows:
+            if row['status'] != 'compared':
+                print(row['name'], '|', row['baseline'] and round(row['baseline'], 2), '|',
+                      row['current'] and round(row['current'], 2), row['unit'], '|', '|', row['status'].upper())
+                continue
+            print(row['name'], '|', round(row['baseline'], 2), '|', round(row['current'], 2), row['unit'], '|',
+                  round(100 * row['change'], 1), '|', 'REGRESSION' if row['regression'] else '')
+        regressions = sum(row['regression'] for row in rows)
+        compared = sum(row['status'] == 'compared' for row in rows)
+        print(regressions, 'regression(s) out of', compared, 'benchmarks compared,',
+              len(rows) - compared, 'only in one run')
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,264 @@
+import os
+import queue
+import re
+import shutil
+import threading
+import torch
+from modelManager import updateRegistry
+
+MODEL_FOLDER = './model'
+SNAPSHOT_FORMAT = 1
+
+
+def atomicSave(obj, path):
+    """Saves obj with torch.save to a temp file next to path, then renames it over path,
+    so a crash mid-write never leaves a half written checkpoint behind
+
+    Args:
+        obj: anything torch.save accepts (usually a state_dict)
+        path (str): final file path
+    """
+    folder = os.path.dirname(path) or '.'
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    tempPath = path + '.tmp'
+    with open(tempPath, 'wb') as file:
+        torch.save(obj, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tempPath, path)
+
+
+def snapshotCheckpoint(model):
+    """Copies a model's checkpoint (header + state_dict) so it can be written while training goes on
+    """
+    checkpoint = model.checkpoint()
+    checkpoint['state_dict'] = {key: value.detach().clone() for key, value in checkpoint['state_dict'].items()}
+    return checkpoint
+
+
+def snapshotPath(model_filename):
+    """Folder holding the training snapshot of model/<model_filename>
+    """
+    return os.path.join(MODEL_FOLDER, os.path.splitext(model_filename)[0] + '.snapshot')
+
+
+def hasSnapshot(model_filename):
+    return os.path.exists(os.path.join(snapshotPath(model_filename), 'trainer.pth'))
+
+
+def saveSnapshot(trainer, model_filename):
+    """Saves everything needed to resume training: weights, optimizer state, game count (so the
+    epsilon schedule), record/total score and the replay memory. The folder is written next to
+    the old one and swapped in once complete, so a crash keeps the previous snapshot
+
+    Args:
+        trainer (AgentTrainer): trainer holding the agent to save
+        model_filename (str): model file name in the model/ dir, the snapshot goes in <name>.snapshot/
+    """
+    agent = trainer.agent
+    folder = snapshotPath(model_filename)
+    tempFolder = folder + '.tmp'
+    if os.path.exists(tempFolder):
+        shutil.rmtree(tempFolder)
+    os.makedirs(tempFolder)
+
+    # Replay memory as plain .npy files (one bulk read each when resuming)
+    agent.memory.save(os.path.join(tempFolder, 'memory'))
+
+    qTrainer = getattr(agent, 'trainer', None) # the tabular agent has no optimizer
+    state = {
+        'format': SNAPSHOT_FORMAT,
+        'model': agent.model.state_dict(),
+        'optimizer': qTrainer.optimizer.state_dict() if qTrainer else None,
+        'updates': qTrainer.updates if qTrainer else 0,
+        'numGames': agent.num_games,
+        'epsilon': agent.epsilon,
+        'memoryType': type(agent.memory).__name__,
+        'record': trainer.record,
+        'totalScore': trainer.totalScore,
+        'steps': trainer.steps
+    }
+    atomicSave(state, os.path.join(tempFolder, 'trainer.pth'))
+
+    # Swap the folders: rename can't replace a non-empty folder, so move the old one aside first
+    oldFolder = folder + '.old'
+    if os.path.exists(folder):
+        os.replace(folder, oldFolder)
+    os.replace(tempFolder, folder)
+    if os.path.exists(oldFolder):
+        shutil.rmtree(oldFolder)
+
+
+def loadSnapshot(trainer, model_filename):
+    """Restores a snapshot written by saveSnapshot into the trainer and its agent.
+    The replay memory is read into its own arrays, so nothing keeps the snapshot folder
+    open and the next saveSnapshot can swap it. It is loaded before anything else is
+    changed, so a snapshot that can't be restored leaves the agent as it was
+
+    Args:
+        trainer (AgentTrainer): trainer to restore (its agent must match the saved backend)
+        model_filename (str): model file name in the model/ dir
+    """
+    agent = trainer.agent
+    folder = snapshotPath(model_filename)
+    state = torch.load(os.path.join(folder, 'trainer.pth'), weights_only=True)
+    if state['format'] != SNAPSHOT_FORMAT:
+        raise ValueError('Unknown snapshot format: ' + str(state['format']))
+
+    # Check the weights fit before touching anything
+    current = {key: tuple(value.shape) for key, value in agent.model.state_dict().items()}
+    if current != {key: tuple(value.shape) for key, value in state['model'].items()}:
+        raise ValueError('Snapshot ' + folder + " doesn't match the agent's model")
+
+    # A uniform memory loads into a prioritized one (max priority everywhere) and the other
+    # way round (priorities dropped)
+    memoryType = state.get('memoryType', type(agent.memory).__name__)
+    if memoryType != type(agent.memory).__name__:
+        print('Loading a', memoryType, 'snapshot into a', type(agent.memory).__name__)
+    agent.memory.load(os.path.join(folder, 'memory'))
+
+    agent.model.load_state_dict(state['model'])
+    qTrainer = getattr(agent, 'trainer', None)
+    if qTrainer and state['optimizer'] is not None:
+        qTrainer.optimizer.load_state_dict(state['optimizer'])
+        qTrainer.updates = state['updates']
+        agent.policy.refresh()
+        agent.policyVersion = qTrainer.updates
+    agent.num_games = state['numGames']
+    agent.epsilon = state['epsilon']
+
+    trainer.record = state['record']
+    trainer.totalScore = state['totalScore']
+    trainer.steps = state['steps']
+
+
+def trainerStats(trainer):
+    """Training stats recorded in the model registry. The trainer's metrics must already
+    include the last game (AgentTrainer.train updates them before checkpointing)
+    """
+    numGames = trainer.agent.num_games
+    return {
+        'record': trainer.record,
+        'games': numGames,
+        'meanScore': trainer.totalScore / numGames if numGames else 0.0
+    }
+
+
+class Checkpointer:
+    """Writes model checkpoints from a background thread. The training thread only
+    copies the state_dict; the write (temp file + atomic rename) happens off the hot path.
+    """
+
+    def __init__(self, model_filename='model.pth', on_record=True, every_games=0, on_exit=True, keep_last=0,
+                 snapshot_every=0, snapshot_on_exit=False) -> None:
+        """Initializes the checkpointer and starts its writer thread
+
+        Args:
+            model_filename (str, optional): file name in the model/ dir, always holds the latest checkpoint. Defaults to 'model.pth'.
+            on_record (bool, optional): save when a game beats the record. Defaults to True.
+            every_games (int, optional): also save every N games, 0 to disable. Defaults to 0.
+            on_exit (bool, optional): save when close() is called. Defaults to True.
+            keep_last (int, optional): also keep this many numbered checkpoints (<name>.g<games><ext>). Defaults to 0.
+            snapshot_every (int, optional): save a full training snapshot (see saveSnapshot) every N games, 0 to disable. Defaults to 0.
+            snapshot_on_exit (bool, optional): save a full training snapshot when close() is called. Defaults to False.
+        """
+        self.modelFilename = model_filename
+        self.path = os.path.join(MODEL_FOLDER, model_filename)
+        self.onRecord = on_record
+        self.everyGames = every_games
+        self.onExit = on_exit
+        self.keepLast = keep_last
+        self.snapshotEvery = snapshot_every
+        self.snapshotOnExit = snapshot_on_exit
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._writer, name='Checkpointer', daemon=True)
+        self._thread.start()
+
+    def save(self, model, num_games=None, stats=None):
+        """Queues a checkpoint of the model's current weights
+
+        Args:
+            model (Linear_QNet): model to save (anything with a checkpoint method)
+            num_games (int, optional): games played, used to number the kept checkpoints. Defaults to None.
+            stats (dict, optional): training stats for the model registry (record, games, meanScore). Defaults to None.
+        """
+        self._queue.put((snapshotCheckpoint(model), num_games, stats))
+
+    def onGameOver(self, trainer, new_record):
+        """Saves the model (and snapshot) if the cadence asks for it
+
+        Args:
+            trainer (AgentTrainer): trainer holding the agent to save
+            new_record (bool): whether the last game beat the record
+
+        Returns:
+            bool: whether a checkpoint was queued
+        """
+        numGames = trainer.agent.num_games
+        if self.snapshotEvery and numGames % self.snapshotEvery == 0:
+            saveSnapshot(trainer, self.modelFilename)
+
+        if (self.onRecord and new_record) or (self.everyGames and numGames % self.everyGames == 0):
+            self.save(trainer.agent.model, numGames, trainerStats(trainer))
+            return True
+        return False
+
+    def close(self, trainer=None):
+        """Saves a last checkpoint and snapshot (if asked to on exit), waits for every pending
+        write and stops the writer thread
+
+        Args:
+            trainer (AgentTrainer, optional): trainer holding the agent to save on exit. Defaults to None.
+        """
+        if trainer is not None:
+            if self.onExit:
+                self.save(trainer.agent.model, trainer.agent.num_games, trainerStats(trainer))
+            if self.snapshotOnExit:
+                saveSnapshot(trainer, self.modelFilename)
+        if self._thread.is_alive():
+            self._queue.put(None) # stop signal, once every write before it is done
+            self._thread.join()
+
+    ## PRIVATE ##
+
+    def _writer(self):
+        """Writes queued checkpoints one after the other
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            checkpoint, numGames, stats = item
+            try:
+                atomicSave(checkpoint, self.path)
+                params = sum(tensor.numel() for tensor in checkpoint['state_dict'].values())
+                updateRegistry(os.path.basename(self.path), os.path.dirname(self.path), params=params, **(stats or {}))
+                if self.keepLast and numGames is not None:
+                    stem, ext = os.path.splitext(self.path)
+                    atomicSave(checkpoint, stem + '.g' + str(numGames) + ext)
+                    self._prune()
+            except Exception as error:
+                # Keep the thread alive whatever went wrong, or every later save (and close) would hang
+                print('Checkpoint failed:', repr(error))
+            finally:
+                self._queue.task_done()
+
+    def _prune(self):
+        """Deletes the numbered checkpoints older than the last keep_last
+        """
+        folder, name = os.path.split(self.path)
+        stem, ext = os.path.splitext(name)
+        pattern = re.compile(re.escape(stem) + r'\.g(\d+)' + re.escape(ext) + '$')
+
+        numbered = []
+        for fileName in os.listdir(folder):
+            match = pattern.match(fileName)
+            if match:
+                numbered.append((int(match.group(1)), fileName))
+
+        numbered.sort()
+        for _, fileName in numbered[:-self.keepLast]:
+            os.remove(os.path.join(folder, fileName))
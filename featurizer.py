@@ -0,0 +1,98 @@
+import numpy as np
+from gameHeadless import Direction, BLOCK_SIZE
+from gameNumpy import EAST, SOUTH, WEST, NORTH, DIRECTION_DX, DIRECTION_DY, TURN_TABLE
+
+# Builds the 11 feature state used by the agent:
+# [
+# Danger Straight, Danger Right, Danger Left,
+# Moving West, Moving East, Moving North, Moving South,
+# Fruit West, Fruit East, Fruit North, Fruit South
+# ]
+# Everything direction dependent comes from lookup tables instead of branching.
+
+# Cell offsets of the (straight, right, left) neighbours, per clockwise direction index (see gameNumpy)
+TURN_DX = DIRECTION_DX[TURN_TABLE]
+TURN_DY = DIRECTION_DY[TURN_TABLE]
+
+# (West, East, North, South) movement flags, per clockwise direction index
+DIRECTION_FLAGS = np.array(
+    [[d == WEST, d == EAST, d == NORTH, d == SOUTH] for d in range(4)],
+    dtype=np.uint8
+)
+
+# Same tables for the single game, keyed by Direction and stored as plain tuples (faster to index one at a time)
+_CLOCKWISE = {Direction.EAST: EAST, Direction.SOUTH: SOUTH, Direction.WEST: WEST, Direction.NORTH: NORTH}
+_TURN_OFFSETS = {
+    direction: tuple(zip(TURN_DX[index].tolist(), TURN_DY[index].tolist()))
+    for direction, index in _CLOCKWISE.items()
+}
+_FLAGS = {direction: DIRECTION_FLAGS[index].tolist() for direction, index in _CLOCKWISE.items()}
+
+
+def getState(game):
+    """Gets the state of one game from its occupancy grid
+
+    Args:
+        game (HeadlessSnakeGame): The instance of the snake game that will be analyzed (or a subclass,
+        game.Game has bigger blocks and north at -y so it isn't supported)
+
+    Returns:
+        array of uint8 (11,): state array conveying game state data
+    """
+    if game.blockSize != BLOCK_SIZE:
+        raise ValueError('getState needs ' + str(BLOCK_SIZE) + 'px blocks (HeadlessSnakeGame), got ' + str(game.blockSize))
+    head = game.snakeHead
+    headX = head.x // BLOCK_SIZE
+    headY = head.y // BLOCK_SIZE
+    width = game.gridWidth
+    height = game.gridHeight
+    occupancy = game.occupancy
+
+    # Danger Straight, Right, Left: wall or body on the neighbouring cell
+    state = []
+    for dx, dy in _TURN_OFFSETS[game.direction]:
+        x = headX + dx
+        y = headY + dy
+        state.append(not (0 <= x < width and 0 <= y < height) or occupancy[y * width + x] > 0)
+
+    # Direction of movement
+    state += _FLAGS[game.direction]
+
+    # Food relative location
+    fruit = game.fruit
+    state += (fruit.x < head.x, fruit.x > head.x, fruit.y > head.y, fruit.y < head.y)
+
+    return np.array(state, dtype=np.uint8)
+
+
+def getBatchStates(game):
+    """Gets the state of every game of a BatchSnakeGame at once
+
+    Args:
+        game (BatchSnakeGame): the batch of games to analyze
+
+    Returns:
+        array of uint8 (numGames, 11): state arrays of every game
+    """
+    states = np.empty((game.numGames, 11), dtype=np.uint8)
+    rows = np.arange(game.numGames)[:, None]
+
+    # Danger Straight, Right, Left
+    x = game.headX[:, None] + TURN_DX[game.direction]
+    y = game.headY[:, None] + TURN_DY[game.direction]
+    outside = (x < 0) | (x >= game.width) | (y < 0) | (y >= game.height)
+    cells = np.where(outside, 0, y * game.width + x)
+    states[:, 0:3] = outside | game.occupied[rows, cells]
+
+    # Direction of movement
+    states[:, 3:7] = DIRECTION_FLAGS[game.direction]
+
+    # Food relative location
+    fruitX = game.fruit % game.width
+    fruitY = game.fruit // game.width
+    states[:, 7] = fruitX < game.headX
+    states[:, 8] = fruitX > game.headX
+    states[:, 9] = fruitY > game.headY
+    states[:, 10] = fruitY < game.headY
+
+    return states
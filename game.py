@@ -1,21 +1,11 @@
 import pygame
 import random
 import numpy as np
-from enum import Enum
-from collections import namedtuple
+from collections import deque
+from gameHeadless import Direction, Point, STRAIGHT, RIGHT, LEFT, TURNS, toActionIndex # shared by every game
 
 
 
-# Define directions
-class Direction(Enum):
-    NORTH = 0
-    SOUTH = 1
-    EAST = 2
-    WEST = 3
-    
-# Define point tuple
-Point = namedtuple('Point', 'x, y')
-
 # Define Constants
 BLOCK_SIZE = 30 #px
 
@@ -31,13 +21,16 @@ class Game:
     """
     Simple snake game made specially for use with an AI player. 
     """
+    
+    blockSize = BLOCK_SIZE # px per cell (30, not the 20 of HeadlessSnakeGame)
         
-    def __init__(self, width=800, height=600) -> None:
+    def __init__(self, width=800, height=600, fps=60) -> None:
         """Initializes the game enviroment
 
         Args:
             width (int, optional): width of the game screen. Defaults to 800.
             height (int, optional): height of the game screen. Defaults to 600.
+            fps (int, optional): frame rate cap. None or 0 runs as fast as the simulation allows. Defaults to 60.
         """
         pygame.init()
         # Set screen dimentions
@@ -47,7 +40,13 @@ class Game:
         # Initialize screen
         self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
         pygame.display.set_caption("SnakeAI")
-        self.FPS = 60
+        self.FPS = fps
+        
+        # Load the score font once, the label is only re-rendered when the score changes
+        self.scoreFont = pygame.font.Font('Roboto-Thin.ttf', 24)
+        self.scoreLabel = None
+        self.labelRect = None
+        self._shownScore = None
         
         # Create screen and fps clock
         
@@ -67,11 +66,12 @@ class Game:
         
         self.snakeHead = Point(BLOCK_SIZE * 5, BLOCK_SIZE * 5)
         
-        self.snakeBody = [
+        self.snakeBody = deque([
             self.snakeHead,
             Point(self.snakeHead.x - BLOCK_SIZE, self.snakeHead.y),
             Point(self.snakeHead.x - (BLOCK_SIZE * 2), self.snakeHead.y)
-        ]
+        ])
+        self._buildOccupancy()
         
         # Define initial snake direction
         self.direction = Direction.EAST
@@ -79,27 +79,35 @@ class Game:
         
         # Define initial game params
         self.fruit = None
+        self.won = False # True once the snake fills the board
         self._createFruit()
         
         # Keep track of frames
         self.frameIteration = 0
         
+        # Rendering state: the next frame is drawn in full
+        self._fullRedraw = True
+        self._vacated = None # tail cell left by the last move
+        self._drawnFruit = None
+        
     def _createFruit(self):
-        """Create a fruit at a random position on the window, outside of the snake's body
+        """Create a fruit at a random free cell on the window, outside of the snake's body.
+        Sets won instead when the snake fills the whole board
         """
-        x = random.randint(0, (self.SCREEN_WIDTH - BLOCK_SIZE) // BLOCK_SIZE) * BLOCK_SIZE
-        y = random.randint(0, (self.SCREEN_HEIGHT - BLOCK_SIZE) // BLOCK_SIZE) * BLOCK_SIZE
-        self.fruit = Point(x,y)
+        if not self._freeCells:
+            self.won = True
+            return
         
-        # Prevent fruit from being place inside the snake
-        if self.fruit in self.snakeBody:
-            self._createFruit()
+        cell = random.choice(self._freeCells)
+        x = (cell % self.gridWidth) * BLOCK_SIZE
+        y = (cell // self.gridWidth) * BLOCK_SIZE
+        self.fruit = Point(x,y)
             
     def playStep(self, action=None):
         """Plays the next frame of the game
 
         Args:
-            action ([int, int, int], optional): The action provided by the agent from the model. Defaults to None.
+            action (int, optional): The action provided by the agent from the model [0=straight, 1=right, 2=left]. Defaults to None.
 
         Returns:
             reward (int): The reward for completing the current step
@@ -115,7 +123,8 @@ class Game:
         
         # Move the Snake
         self._moveSnake() # updates the head's position
-        self.snakeBody.insert(0, self.snakeHead)
+        self.snakeBody.appendleft(self.snakeHead)
+        self._occupy(self.snakeHead)
         
         #Init reward value
         reward = 0
@@ -131,10 +140,13 @@ class Game:
         # Place new food if eaten, or just move the snake
         if self._growSnake():
             reward = 10
+            # Snake fills the whole board
+            game_over = self.won
         
         # Update the ui
         self.render()
-        self.fpsClock.tick(self.FPS)
+        if self.FPS:
+            self.fpsClock.tick(self.FPS)
         
         # Return key parameters
         return reward, game_over, self.score
@@ -147,23 +159,32 @@ class Game:
         self.reset()
     
     def _showScore(self, color):
-        """Shows the score as well as updates the score every frame
+        """Shows the score, re-rendering the label only when the score changed
 
         Args:
             color (pygame.Color): The color of the text label
+
+        Returns:
+            pygame.Rect: area of the screen that was redrawn
         """
-        snakeScore = str(self.score)
-        scoreFont = pygame.font.Font('Roboto-Thin.ttf', 24)
-        # Create text display for score
-        self.scoreLabel = scoreFont.render(snakeScore, True, color)
+        if self.score != self._shownScore:
+            # Create text display for score
+            self.scoreLabel = self.scoreFont.render(str(self.score), True, color)
+            self._shownScore = self.score
         
-        # Create rect object to nest the score
+        # Create rect object to nest the score (covering the old label too, it may have been wider)
+        oldRect = self.labelRect
         self.labelRect = self.scoreLabel.get_rect()
         self.labelRect.left = 0
         self.labelRect.top = 0
+        area = self.labelRect.union(oldRect) if oldRect else self.labelRect
         
-        # Draw score to the display
+        # Redraw the board under the label, then draw score to the display
+        self.screen.fill(BLACK, area)
+        self._redrawCells(area)
         self.screen.blit(self.scoreLabel, self.labelRect)
+        
+        return area
     
     def _growSnake(self) -> bool:
         """
@@ -171,11 +192,13 @@ class Game:
         """
         
         if self.snakeHead.x == self.fruit.x and self.snakeHead.y == self.fruit.y:
+            self._vacated = None
             self.score += 1
             self._createFruit()
             return True
         else:
-            self.snakeBody.pop()
+            self._vacated = self.snakeBody.pop()
+            self._vacate(self._vacated)
             return False
 
     def _drawSnake(self):
@@ -184,33 +207,73 @@ class Game:
         """
 
         for segment in self.snakeBody:
-            pygame.draw.rect(
-                self.screen, 
-                RED, 
-                pygame.Rect(segment.x, segment.y, BLOCK_SIZE, BLOCK_SIZE)
-                )    
+            self._drawCell(segment, RED)
             
     def _drawFruit(self):
         """
         Draws the fruit based on the fruit position
         """
+        self._drawnFruit = self.fruit
+        return self._drawCell(self.fruit, GREEN)
+    
+    def _drawCell(self, pt, color):
+        """Draws one board cell
 
-        pygame.draw.rect(
-            self.screen, 
-            GREEN, 
-            pygame.Rect(self.fruit.x, self.fruit.y, BLOCK_SIZE, BLOCK_SIZE)
-            )
+        Args:
+            pt (Point): top left corner of the cell
+            color (pygame.Color): fill color
+
+        Returns:
+            pygame.Rect: area of the screen that was drawn
+        """
+        rect = pygame.Rect(pt.x, pt.y, BLOCK_SIZE, BLOCK_SIZE)
+        pygame.draw.rect(self.screen, color, rect)
+        return rect
+    
+    def _redrawCells(self, area):
+        """Redraws the snake and fruit cells inside an area of the screen
+        """
+        firstColumn = max(area.left // BLOCK_SIZE, 0)
+        lastColumn = min((area.right - 1) // BLOCK_SIZE, self.gridWidth - 1)
+        firstRow = max(area.top // BLOCK_SIZE, 0)
+        lastRow = min((area.bottom - 1) // BLOCK_SIZE, self.gridHeight - 1)
+        
+        for row in range(firstRow, lastRow + 1):
+            for column in range(firstColumn, lastColumn + 1):
+                pt = Point(column * BLOCK_SIZE, row * BLOCK_SIZE)
+                if self.occupancy[self._cellIndex(pt)]:
+                    self._drawCell(pt, RED)
+                elif pt == self.fruit:
+                    self._drawCell(pt, GREEN)
 
     def render(self):
         """
-        Updates the snake game and the display.
+        Updates the snake game and the display. After the first frame of a game
+        only the changed cells are drawn and passed to the display update.
         """
-        self.screen.fill(BLACK)
-        
-        self._drawSnake()
-        self._drawFruit()
-        self._showScore(WHITE)
-        pygame.display.update()      
+        if self._fullRedraw:
+            self.screen.fill(BLACK)
+            
+            self._drawSnake()
+            self._drawFruit()
+            self._showScore(WHITE)
+            pygame.display.update()
+            self._fullRedraw = False
+            return
+        
+        # Vacated tail, new head and moved fruit
+        dirty = []
+        if self._vacated is not None:
+            dirty.append(self._drawCell(self._vacated, BLACK))
+        dirty.append(self._drawCell(self.snakeHead, RED))
+        if self.fruit != self._drawnFruit:
+            dirty.append(self._drawFruit())
+        
+        # The score sits on top of the board: redraw it if it changed or a cell under it did
+        if self.score != self._shownScore or self.labelRect.collidelist(dirty) != -1:
+            dirty.append(self._showScore(WHITE))
+        
+        pygame.display.update(dirty)
     
     def _handleUserInput(self):
         """
@@ -230,21 +293,13 @@ class Game:
         """Alternative to handleInputs. Used by the agent to allow the AI to controll the snake.
 
         Args:
-            action ([int, int, int]): array indicating which direction to turn [straight, right, left]
+            action (int): which direction to turn [0=straight, 1=right, 2=left] (a legacy one-hot list also works)
         """
         # Can move straight, turn right, or turn left
+        if action is None:
+            return
         
-        direction_queue = [Direction.EAST, Direction.SOUTH, Direction.WEST, Direction.NORTH]
-        q_index = direction_queue.index(self.direction)
-        
-        if np.array_equal(action, [1, 0, 0]):
-            self.changeDirection = direction_queue[q_index]
-        elif np.array_equal(action, [0, 1, 0]):
-            next_q_index = (q_index + 1) % 4 # Iterate right w/ no overflow
-            self.changeDirection = direction_queue[next_q_index] # right turn E -> S -> W -> N
-        elif np.array_equal(action, [0, 0, 1]):
-            next_q_index = (q_index - 1) % 4 # Iterate left w/ no overflow
-            self.changeDirection = direction_queue[next_q_index] # left turn E -> N -> W -> S
+        self.changeDirection = TURNS[self.direction][toActionIndex(action)]
         
     def _moveSnake(self):
         """
@@ -294,9 +349,65 @@ class Game:
         # Collides with wall
         if pt.x < 0 or pt.x > self.SCREEN_WIDTH - BLOCK_SIZE or pt.y < 0 or pt.y > self.SCREEN_HEIGHT - BLOCK_SIZE:
             return True
-        # Collides with body
-        if pt in self.snakeBody[1:]:
-            return True
-        return False
+        # Collides with body (the head's own cell doesn't count, same as snakeBody[1:])
+        count = self.occupancy[self._cellIndex(pt)]
+        if pt == self.snakeBody[0]:
+            count -= 1
+        return count > 0
+    
+    def _cellIndex(self, pt) -> int:
+        """Converts an on-screen point to its index in the occupancy grid
+
+        Args:
+            pt (Point): Point inside the game window
+
+        Returns:
+            int: index of the point's cell
+        """
+        return (pt.y // BLOCK_SIZE) * self.gridWidth + pt.x // BLOCK_SIZE
+    
+    def _inBounds(self, pt) -> bool:
+        """Whether or not a point lies inside the game window
+        """
+        return 0 <= pt.x <= self.SCREEN_WIDTH - BLOCK_SIZE and 0 <= pt.y <= self.SCREEN_HEIGHT - BLOCK_SIZE
+    
+    def _buildOccupancy(self):
+        """Rebuilds the occupancy grid from the snake body. The grid counts the
+        segments on every cell so collision checks are a single lookup
+        """
+        self.gridWidth = (self.SCREEN_WIDTH - BLOCK_SIZE) // BLOCK_SIZE + 1
+        self.gridHeight = (self.SCREEN_HEIGHT - BLOCK_SIZE) // BLOCK_SIZE + 1
+        self.occupancy = bytearray(self.gridWidth * self.gridHeight)
+        
+        # Free cells, kept as a list for O(1) random picks plus each cell's slot in that list
+        self._freeCells = list(range(self.gridWidth * self.gridHeight))
+        self._freeSlot = list(range(self.gridWidth * self.gridHeight))
+        
+        for segment in self.snakeBody:
+            self._occupy(segment)
+    
+    def _occupy(self, pt):
+        """Marks a new snake segment in the occupancy grid (heads outside the window are skipped)
+        """
+        if self._inBounds(pt):
+            cell = self._cellIndex(pt)
+            if self.occupancy[cell] == 0:
+                # Swap the last free cell into this cell's slot
+                slot = self._freeSlot[cell]
+                last = self._freeCells.pop()
+                if last != cell:
+                    self._freeCells[slot] = last
+                    self._freeSlot[last] = slot
+            self.occupancy[cell] += 1
+    
+    def _vacate(self, pt):
+        """Removes a snake segment from the occupancy grid
+        """
+        if self._inBounds(pt):
+            cell = self._cellIndex(pt)
+            self.occupancy[cell] -= 1
+            if self.occupancy[cell] == 0:
+                self._freeSlot[cell] = len(self._freeCells)
+                self._freeCells.append(cell)
     
         
\ No newline at end of file
@@ -0,0 +1,306 @@
+import random
+import numpy as np
+from enum import Enum
+from collections import namedtuple, deque
+
+
+
+# Define directions
+class Direction(Enum):
+    NORTH = 0
+    SOUTH = 1
+    EAST = 2
+    WEST = 3
+    
+# Define point tuple
+Point = namedtuple('Point', 'x, y')
+
+# Define actions (relative to the current direction)
+STRAIGHT = 0
+RIGHT = 1
+LEFT = 2
+
+# New direction for each action [straight, right, left]. Right turn E -> S -> W -> N, left turn E -> N -> W -> S
+TURNS = {
+    Direction.EAST: (Direction.EAST, Direction.SOUTH, Direction.NORTH),
+    Direction.SOUTH: (Direction.SOUTH, Direction.WEST, Direction.EAST),
+    Direction.WEST: (Direction.WEST, Direction.NORTH, Direction.SOUTH),
+    Direction.NORTH: (Direction.NORTH, Direction.EAST, Direction.WEST)
+}
+
+def toActionIndex(action) -> int:
+    """Converts an action to its index. Accepts an index or a legacy one-hot [straight, right, left] list
+
+    Args:
+        action (int or [int, int, int]): the action
+
+    Returns:
+        int: index of the action
+    """
+    if isinstance(action, (int, np.integer)):
+        return int(action)
+    return int(np.argmax(action))
+
+# Define Constants
+BLOCK_SIZE = 20 #px
+
+class HeadlessSnakeGame:
+    """Simple snake game made to be controlled by
+    an experimental AI model(s). Runs without a window, gamePyglet.SnakeGame
+    adds the graphics on top of it
+    """
+    
+    blockSize = BLOCK_SIZE # px per cell, checked by featurizer.getState
+    
+    def __init__(self, width=800, height=600) -> None:
+        """Initializes the game enviroment
+
+        Args:
+            width (int, optional): width of the game board in px. Defaults to 800.
+            height (int, optional): height of the game board in px. Defaults to 600.
+        """
+        # Set screen dimentions
+        self.SCREEN_WIDTH = width
+        self.SCREEN_HEIGHT = height
+        
+        # Init high score counter
+        self.h_score = 0
+        
+        # Init kill variable (whether or not to stop game entirely)
+        self.kill = False
+        
+        self.reset()
+        
+    def reset(self):
+        """Resets the game to original state
+        """
+        
+        # Initialize score coutner
+        # Initialize snake head & body
+        self.score = 0
+        
+        self.snakeHead = Point(BLOCK_SIZE * 5, BLOCK_SIZE * 5)
+        
+        self.snakeBody = deque([
+            self.snakeHead,
+            Point(self.snakeHead.x - BLOCK_SIZE, self.snakeHead.y),
+            Point(self.snakeHead.x - (BLOCK_SIZE * 2), self.snakeHead.y)
+        ])
+        self._buildOccupancy()
+        
+        # Initialize the fruit
+        self.fruit = None
+        self.won = False # True once the snake fills the board
+        self._createFruit()
+        
+        # Set snake's initial direction of movement
+        self.direction = Direction.EAST
+        self.changeDirection = Direction.EAST
+        
+        # Initialize backend variables
+        self.frameIteration = 0
+        """Keeps track of the current frame number
+        """
+        
+    def playStep(self, action=None):
+        """Plays the next frame of the game
+
+        Args:
+            action (int, optional): The action provided by the agent from the model [0=straight, 1=right, 2=left]. Defaults to None.
+
+        Returns:
+            reward (int): The reward for completing the current step
+            gameOver (bool): Indication of the game ending
+            score (int): The score after completing the current step
+        """
+        # Update frame iteration
+        self.frameIteration += 1
+        
+        # AI Input
+        self._agentInput(action)
+        
+        # Move the Snake
+        self._moveSnake() # updates the head's position
+        self.snakeBody.appendleft(self.snakeHead)
+        self._occupy(self.snakeHead)
+        
+        #Init reward value
+        reward = 0
+        
+        # Check for game over conditions
+        game_over = False
+        if self.find_collision() or self.frameIteration > 100 * len(self.snakeBody):
+            # When collision occurs or snake does not find food for long time
+            game_over = True
+            reward = -10
+            return reward, game_over, self.score 
+        
+        # Place new food if eaten, or just move the snake
+        if self._growSnake():
+            reward = 10
+            # Snake fills the whole board
+            game_over = self.won
+            
+        # Update high score
+        if self.score > self.h_score:
+            self.h_score = self.score
+            
+        # Return key parameters
+        return reward, game_over, self.score
+    
+    def find_collision(self, pt=None) -> bool:
+        """Finds any collisions occurring between the snake head and the walls/body
+
+        Args:
+            pt (Point, optional): Point to check for collisions against. Defaults to None.
+
+        Returns:
+            bool: whether or not a collision was found
+        """
+        if pt is None:
+            pt = self.snakeHead
+        # Collides with wall
+        if pt.x < 0 or pt.x > self.SCREEN_WIDTH - BLOCK_SIZE or pt.y < 0 or pt.y > self.SCREEN_HEIGHT - BLOCK_SIZE:
+            return True
+        # Collides with body (the head's own cell doesn't count, same as snakeBody[1:])
+        count = self.occupancy[self._cellIndex(pt)]
+        if pt == self.snakeBody[0]:
+            count -= 1
+        return count > 0
+    
+    ## PRIVATE ##
+    
+    def _cellIndex(self, pt) -> int:
+        """Converts an on-screen point to its index in the occupancy grid
+
+        Args:
+            pt (Point): Point inside the game window
+
+        Returns:
+            int: index of the point's cell
+        """
+        return (pt.y // BLOCK_SIZE) * self.gridWidth + pt.x // BLOCK_SIZE
+    
+    def _inBounds(self, pt) -> bool:
+        """Whether or not a point lies inside the game window
+        """
+        return 0 <= pt.x <= self.SCREEN_WIDTH - BLOCK_SIZE and 0 <= pt.y <= self.SCREEN_HEIGHT - BLOCK_SIZE
+    
+    def _buildOccupancy(self):
+        """Rebuilds the occupancy grid from the snake body. The grid counts the
+        segments on every cell so collision checks are a single lookup
+        """
+        self.gridWidth = (self.SCREEN_WIDTH - BLOCK_SIZE) // BLOCK_SIZE + 1
+        self.gridHeight = (self.SCREEN_HEIGHT - BLOCK_SIZE) // BLOCK_SIZE + 1
+        self.occupancy = bytearray(self.gridWidth * self.gridHeight)
+        
+        # Free cells, kept as a list for O(1) random picks plus each cell's slot in that list
+        self._freeCells = list(range(self.gridWidth * self.gridHeight))
+        self._freeSlot = list(range(self.gridWidth * self.gridHeight))
+        
+        for segment in self.snakeBody:
+            self._occupy(segment)
+    
+    def _occupy(self, pt):
+        """Marks a new snake segment in the occupancy grid (heads outside the window are skipped)
+        """
+        if self._inBounds(pt):
+            cell = self._cellIndex(pt)
+            if self.occupancy[cell] == 0:
+                # Swap the last free cell into this cell's slot
+                slot = self._freeSlot[cell]
+                last = self._freeCells.pop()
+                if last != cell:
+                    self._freeCells[slot] = last
+                    self._freeSlot[last] = slot
+            self.occupancy[cell] += 1
+    
+    def _vacate(self, pt):
+        """Removes a snake segment from the occupancy grid
+        """
+        if self._inBounds(pt):
+            cell = self._cellIndex(pt)
+            self.occupancy[cell] -= 1
+            if self.occupancy[cell] == 0:
+                self._freeSlot[cell] = len(self._freeCells)
+                self._freeCells.append(cell)
+    
+    def _createFruit(self):
+        """Create a fruit at a random free cell on the window, outside of the snake's body.
+        Sets won instead when the snake fills the whole board
+        """
+        if not self._freeCells:
+            self.won = True
+            return
+        
+        cell = random.choice(self._freeCells)
+        x = (cell % self.gridWidth) * BLOCK_SIZE
+        y = (cell // self.gridWidth) * BLOCK_SIZE
+        self.fruit = Point(x,y)
+            
+    def _gameOver(self):
+        """
+        Resets the game when the snake dies
+        """
+        self.reset()
+        
+    def _growSnake(self) -> bool:
+        """
+        Check for snake and fruit collision and spawns new fruit
+        """
+        
+        if self.snakeHead.x == self.fruit.x and self.snakeHead.y == self.fruit.y:
+            self.score += 1
+            self._createFruit()
+            return True
+        else:
+            self._vacate(self.snakeBody.pop())
+            return False
+    
+    def _moveSnake(self):
+        """
+        Moves the snake every fram based on which direction it is facing.
+        """
+        # Edit snake direction based on any direction changes
+        
+        if self.changeDirection == Direction.NORTH and self.direction != Direction.SOUTH:
+            self.direction = Direction.NORTH
+        elif self.changeDirection == Direction.SOUTH and self.direction != Direction.NORTH:
+            self.direction = Direction.SOUTH
+        elif self.changeDirection == Direction.EAST and self.direction != Direction.WEST:
+            self.direction = Direction.EAST
+        elif self.changeDirection == Direction.WEST and self.direction != Direction.EAST:
+            self.direction = Direction.WEST
+            
+        # Edit snake position based on direction
+        
+        ## unpack x&y from snake head
+        x = self.snakeHead.x
+        y = self.snakeHead.y
+        
+        ## NOTE: Pyglet has reveres y-coord, so north is +y
+        
+        if self.direction == Direction.NORTH:
+            y = y + BLOCK_SIZE # Moves snake up one block
+        elif self.direction == Direction.SOUTH:
+            y = y - BLOCK_SIZE # Moves snake down one block
+        elif self.direction == Direction.WEST:
+            x = x - BLOCK_SIZE # Moves snake left one block
+        elif self.direction == Direction.EAST:
+            x = x + BLOCK_SIZE # Moves snake right one block
+            
+        ## repack x&y into snake head
+        self.snakeHead = Point(x,y)
+        
+    def _agentInput(self, action):
+        """Alternative to handleInputs. Used by the agent to allow the AI to controll the snake.
+
+        Args:
+            action (int): which direction to turn [0=straight, 1=right, 2=left] (a legacy one-hot list also works)
+        """
+        # Can move straight, turn right, or turn left
+        if action is None:
+            return
+        
+        self.changeDirection = TURNS[self.direction][toActionIndex(action)]
+        
\ No newline at end of file
@@ -0,0 +1,195 @@
+import numpy as np
+
+
+
+# Define direction indices, ordered clockwise so a right turn is +1 (E -> S -> W -> N)
+EAST = 0
+SOUTH = 1
+WEST = 2
+NORTH = 3
+
+## NOTE: Same orientation as gamePyglet, so north is +y
+
+# Cell offsets for each direction index
+DIRECTION_DX = np.array([1, 0, -1, 0], dtype=np.int32)
+DIRECTION_DY = np.array([0, -1, 0, 1], dtype=np.int32)
+
+# New direction for every (direction, action) pair. Actions are [straight, right, left]
+TURN_TABLE = np.array(
+    [[d, (d + 1) % 4, (d - 1) % 4] for d in range(4)],
+    dtype=np.int8
+)
+
+# Define Constants
+START_X = 5 # cells
+START_Y = 5 # cells
+START_LENGTH = 3
+FRUIT_TRIES = 8 # random tries before falling back to scanning the free cells
+
+
+class BatchSnakeGame:
+    """Headless snake engine that holds many boards as NumPy arrays and
+    advances all of them at once. Follows the same rules as SnakeGame.playStep,
+    but works in board cells rather than pixels.
+    """
+
+    def __init__(self, num_games, width=40, height=30, seed=None) -> None:
+        """Initializes the batch of games
+
+        Args:
+            num_games (int): number of games to run side by side
+            width (int, optional): width of each board in cells. Defaults to 40 (800px / 20px).
+            height (int, optional): height of each board in cells. Defaults to 30 (600px / 20px).
+            seed (int, optional): seed for the fruit placement. Defaults to None.
+        """
+        self.numGames = num_games
+        self.width = width
+        self.height = height
+        self.numCells = width * height
+
+        self.rng = np.random.default_rng(seed)
+        self._rows = np.arange(num_games)
+
+        # Snake heads & directions
+        self.headX = np.zeros(num_games, dtype=np.int32)
+        self.headY = np.zeros(num_games, dtype=np.int32)
+        self.direction = np.zeros(num_games, dtype=np.int8)
+
+        # Snake bodies, as ring buffers of cell indices (y * width + x)
+        self.body = np.zeros((num_games, self.numCells), dtype=np.int32)
+        self.bodyHead = np.zeros(num_games, dtype=np.int64) # ring index of the head segment
+        self.length = np.zeros(num_games, dtype=np.int64)
+        self.occupied = np.zeros((num_games, self.numCells), dtype=bool)
+
+        # Fruit positions (cell index)
+        self.fruit = np.zeros(num_games, dtype=np.int64)
+
+        # Backend variables
+        self.score = np.zeros(num_games, dtype=np.int64)
+        self.frameIteration = np.zeros(num_games, dtype=np.int64)
+
+        self.reset()
+
+    def reset(self, games=None):
+        """Resets games to their original state
+
+        Args:
+            games (array of int, optional): indices of the games to reset. Defaults to None (all games).
+        """
+        if games is None:
+            games = self._rows
+        if len(games) == 0:
+            return
+
+        self.score[games] = 0
+        self.frameIteration[games] = 0
+
+        # Head at (5, 5) facing east, with the body trailing to the west
+        self.headX[games] = START_X
+        self.headY[games] = START_Y
+        self.direction[games] = EAST
+
+        self.occupied[games] = False
+        for segment in range(START_LENGTH):
+            cell = START_Y * self.width + START_X - (START_LENGTH - 1 - segment)
+            self.body[games, segment] = cell
+            self.occupied[games, cell] = True
+        self.bodyHead[games] = START_LENGTH - 1
+        self.length[games] = START_LENGTH
+
+        self._createFruit(games)
+
+    def step(self, actions=None):
+        """Plays the next frame of every game. Finished games are reset automatically.
+
+        Args:
+            actions (array of int, optional): action index per game [0=straight, 1=right, 2=left].
+            Defaults to None (every snake keeps its direction).
+
+        Returns:
+            rewards (array of float32): The reward for completing the current step
+            dones (array of bool): Indication of each game ending
+            scores (array of int): The score after completing the current step (final score for finished games)
+        """
+        # Update frame iteration
+        self.frameIteration += 1
+
+        # Turn the snakes
+        if actions is not None:
+            self.direction = TURN_TABLE[self.direction, np.asarray(actions)]
+
+        # Find the next head positions
+        x = self.headX + DIRECTION_DX[self.direction]
+        y = self.headY + DIRECTION_DY[self.direction]
+        cell = y * self.width + x
+
+        # Check for game over conditions
+        hitWall = (x < 0) | (x >= self.width) | (y < 0) | (y >= self.height)
+        cell[hitWall] = 0
+        hitBody = ~hitWall & self.occupied[self._rows, cell] # tail hasn't moved yet, same as playStep
+        starved = self.frameIteration > 100 * (self.length + 1)
+        dones = hitWall | hitBody | starved
+
+        rewards = np.zeros(self.numGames, dtype=np.float32)
+        rewards[dones] = -10
+
+        # Move the surviving snakes
+        alive = np.flatnonzero(~dones)
+        aliveCells = cell[alive]
+        self.headX[alive] = x[alive]
+        self.headY[alive] = y[alive]
+        self.bodyHead[alive] = (self.bodyHead[alive] + 1) % self.numCells
+        self.body[alive, self.bodyHead[alive]] = aliveCells
+
+        # Pop the tail of snakes that didn't eat
+        ate = aliveCells == self.fruit[alive]
+        movers = alive[~ate]
+        tail = (self.bodyHead[movers] - self.length[movers]) % self.numCells
+        self.occupied[movers, self.body[movers, tail]] = False
+        self.occupied[alive, aliveCells] = True
+
+        # Grow the snakes that ate and place new fruit
+        eaters = alive[ate]
+        self.length[eaters] += 1
+        self.score[eaters] += 1
+        rewards[eaters] = 10
+        won = self._createFruit(eaters)
+        dones[won] = True
+
+        scores = self.score.copy()
+        self.reset(np.flatnonzero(dones))
+
+        return rewards, dones, scores
+
+    ## PRIVATE ##
+
+    def _createFruit(self, games):
+        """Create a fruit at a random free cell of each given game
+
+        Args:
+            games (array of int): indices of the games that need a new fruit
+
+        Returns:
+            array of int: games whose board is full (the snake has won)
+        """
+        pending = np.asarray(games)
+
+        # Try random cells first, nearly always lands on a free cell
+        for _ in range(FRUIT_TRIES):
+            if len(pending) == 0:
+                return pending
+            cells = self.rng.integers(0, self.numCells, size=len(pending))
+            free = ~self.occupied[pending, cells]
+            self.fruit[pending[free]] = cells[free]
+            pending = pending[~free]
+
+        # Crowded boards: pick from the free cells directly
+        won = []
+        for game in pending:
+            freeCells = np.flatnonzero(~self.occupied[game])
+            if len(freeCells) == 0:
+                won.append(game)
+            else:
+                self.fruit[game] = self.rng.choice(freeCells)
+
+        return np.array(won, dtype=np.int64)
@@ -1,23 +1,10 @@
 import pyglet
-import random
-import numpy as np
-from enum import Enum
-from collections import namedtuple
+from collections import deque
+from gameHeadless import HeadlessSnakeGame, Direction, Point, BLOCK_SIZE
 
 
 
-# Define directions
-class Direction(Enum):
-    NORTH = 0
-    SOUTH = 1
-    EAST = 2
-    WEST = 3
-    
-# Define point tuple
-Point = namedtuple('Point', 'x, y')
-
 # Define Constants
-BLOCK_SIZE = 20 #px
 FPS = 60
 
 # Define Colors
@@ -28,9 +15,9 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 
-class SnakeGame(pyglet.window.Window):
+class SnakeGame(HeadlessSnakeGame, pyglet.window.Window):
     """Simple snake game made to be controlled by
-    an experimental AI model(s)
+    an experimental AI model(s). Draws the HeadlessSnakeGame in a pyglet window
     """
     
     def __init__(self, width=800, height=600) -> None:
@@ -40,23 +27,18 @@ class SnakeGame(pyglet.window.Window):
             width (int, optional): width of the game window. Defaults to 800.
             height (int, optional): height of the game window. Defaults to 600.
         """
-        # Set screen dimentions
-        self.SCREEN_WIDTH = width
-        self.SCREEN_HEIGHT = height
-        
-        # Init high score counter
-        self.h_score = 0
-        
-        # Init kill variable (whether or not to stop game entirely)
-        self.kill = False
-        
         # Initialize the game window
-        super().__init__(
-            width=self.SCREEN_WIDTH, height=self.SCREEN_HEIGHT,
+        pyglet.window.Window.__init__(
+            self,
+            width=width, height=height,
             caption='SnakeGameAI', resizable=False
         )
         
-        self.reset()
+        # Create the graphics once, reset() only moves them
+        self._initGraphics()
+        
+        # Initialize the game itself (also resets it)
+        HeadlessSnakeGame.__init__(self, width, height)
         
     ## PYGLET FUNCTIONS
      # Draws object on the game window
@@ -86,30 +68,59 @@ class SnakeGame(pyglet.window.Window):
     
     
     def reset(self):
-        """Resets the game to original state
+        """Resets the game and its graphics to original state. Reuses the existing
+        batches, labels and rectangles
         """
+        super().reset()
         
-        # Initialize score coutner
-        # Initialize snake head & body
-        self.score = 0
+        # Put the old snake's rectangles back in the pool, then lay out the new snake
+        for rect in self.snakeBody_G:
+            rect.visible = False
+        self._spareRects.extend(self.snakeBody_G)
+        self.snakeBody_G.clear()
+        
+        for segment in self.snakeBody:
+            rect = self._takeRect()
+            rect.position = (segment.x, segment.y)
+            self.snakeBody_G.append(rect)
+        
+        self._updateFruit_G()
+        self._updateScoreLabel()
         
-        self.snakeHead = Point(BLOCK_SIZE * 5, BLOCK_SIZE * 5)
+    def playStep(self, action=None):
+        """Plays the next frame of the game and updates the graphics
+
+        Args:
+            action (int, optional): The action provided by the agent from the model [0=straight, 1=right, 2=left]. Defaults to None.
+
+        Returns:
+            reward (int): The reward for completing the current step
+            gameOver (bool): Indication of the game ending
+            score (int): The score after completing the current step
+        """
+        reward, game_over, score = super().playStep(action)
         
-        self.snakeBody = [
-            self.snakeHead,
-            Point(self.snakeHead.x - BLOCK_SIZE, self.snakeHead.y),
-            Point(self.snakeHead.x - (BLOCK_SIZE * 2), self.snakeHead.y)
-        ]
+        # Update graphics
+        if not game_over:
+            self._updateScoreLabel()
+            self._updateFruit_G()
+            self._updateSnake_G()
         
-        self.snakeBody_G = [] # List of pyglet rectangles representing snake
+        # Return key parameters
+        return reward, game_over, score
+    
+    ## PRIVATE ##
+    
+    def _initGraphics(self):
+        """Creates the batches, shapes and labels used for the whole life of the window
+        """
+        self.snakeBody_G = deque() # Pyglet rectangles representing snake, in body order
+        self._spareRects = [] # Hidden rectangles ready to be reused
         self.snake_batch = pyglet.graphics.Batch() # Batch for snake body
         
-        # Initialize the fruit
-        self.fruit = None
-        self._createFruit()
         self.fruit_G = pyglet.shapes.Rectangle(
-            x=self.fruit.x,
-            y=self.fruit.y,
+            x=0,
+            y=0,
             width=BLOCK_SIZE,
             height=BLOCK_SIZE,
             color=GREEN
@@ -137,103 +148,21 @@ class SnakeGame(pyglet.window.Window):
             color=(255, 223, 94, 100),
             batch=self.score_batch
         )
-        
-        # Set snake's initial direction of movement
-        self.direction = Direction.EAST
-        self.changeDirection = Direction.EAST
-        
-        # Initialize backend variables
-        self.frameIteration = 0
-        """Keeps track of the current frame number
-        """
-        
-    def playStep(self, action=None):
-        """Plays the next frame of the game
-
-        Args:
-            action ([int, int, int], optional): The action provided by the agent from the model. Defaults to None.
-
-        Returns:
-            reward (int): The reward for completing the current step
-            gameOver (bool): Indication of the game ending
-            score (int): The score after completing the current step
-        """
-        # Update frame iteration
-        self.frameIteration += 1
-        
-        # AI Input
-        self._agentInput(action)
-        
-        # Move the Snake
-        self._moveSnake() # updates the head's position
-        self.snakeBody.insert(0, self.snakeHead)
-        
-        #Init reward value
-        reward = 0
-        
-        # Check for game over conditions
-        game_over = False
-        if self.find_collision() or self.frameIteration > 100 * len(self.snakeBody):
-            # When collision occurs or snake does not find food for long time
-            game_over = True
-            reward = -10
-            return reward, game_over, self.score 
-        
-        # Place new food if eaten, or just move the snake
-        if self._growSnake():
-            reward = 10
-            
-        # Update high score
-        if self.score > self.h_score:
-            self.h_score = self.score
-            
-        # Update graphics
-        self._updateScoreLabel()
-        self._updateFruit_G()
-        self._updateSnake_G()
-        
-        
-        # Return key parameters
-        return reward, game_over, self.score
-    
-    def find_collision(self, pt=None) -> bool:
-        """Finds any collisions occurring between the snake head and the walls/body
-
-        Args:
-            pt (Point, optional): Point to check for collisions against. Defaults to None.
-
-        Returns:
-            bool: whether or not a collision was found
-        """
-        if pt is None:
-            pt = self.snakeHead
-        # Collides with wall
-        if pt.x < 0 or pt.x > self.SCREEN_WIDTH - BLOCK_SIZE or pt.y < 0 or pt.y > self.SCREEN_HEIGHT - BLOCK_SIZE:
-            return True
-        # Collides with body
-        if pt in self.snakeBody[1:]:
-            return True
-        return False
     
-    ## PRIVATE ##
+    def _takeRect(self):
+        """Gets a rectangle for a snake segment, from the pool if possible
+        """
+        if self._spareRects:
+            rect = self._spareRects.pop()
+            rect.visible = True
+            return rect
+        
+        return pyglet.shapes.Rectangle(
+            0, 0,
+            BLOCK_SIZE, BLOCK_SIZE,
+            RED, batch=self.snake_batch
+        )
     
-    def _createFruit(self):
-        """Create a fruit at a random position on the window, outside of the snake's body
-        """
-        x = random.randint(0, (self.SCREEN_WIDTH - BLOCK_SIZE) // BLOCK_SIZE) * BLOCK_SIZE
-        y = random.randint(0, (self.SCREEN_HEIGHT - BLOCK_SIZE) // BLOCK_SIZE) * BLOCK_SIZE
-        self.fruit = Point(x,y)
-        
-        # Prevent fruit from being place inside the snake
-        if self.fruit in self.snakeBody:
-            self._createFruit()
-            
-    def _gameOver(self):
-        """
-        Resets the game when the snake dies
-        """
-        self.reset()
-        
     def _updateScoreLabel(self):
         """Shows the score as well as updates the score every frame
 
@@ -242,71 +171,24 @@ class SnakeGame(pyglet.window.Window):
         """
         snakeScore = str(self.score)
         snakeHighScore = str(self.h_score)
-        # Update the text in the score label
-        self.scoreLabel.text = snakeScore
-        self.h_scoreLabel.text = snakeHighScore
+        # Update the text in the score label (only when changed, setting text re-lays out the label)
+        if self.scoreLabel.text != snakeScore:
+            self.scoreLabel.text = snakeScore
+        if self.h_scoreLabel.text != snakeHighScore:
+            self.h_scoreLabel.text = snakeHighScore
     
-    def _growSnake(self) -> bool:
+    def _updateSnake_G(self):
         """
-        Check for snake and fruit collision and spawns new fruit
+        Moves the snake body graphic along with the snake. Only the head changes:
+        the tail rectangle is moved to the new head, or a new one is added when the snake grew
         """
-        
-        if self.snakeHead.x == self.fruit.x and self.snakeHead.y == self.fruit.y:
-            self.score += 1
-            self._createFruit()
-            return True
+        if len(self.snakeBody_G) < len(self.snakeBody):
+            rect = self._takeRect()
         else:
-            self.snakeBody.pop()
-            return False
-    
-    def _moveSnake(self):
-        """
-        Moves the snake every fram based on which direction it is facing.
-        """
-        # Edit snake direction based on any direction changes
+            rect = self.snakeBody_G.pop()
         
-        if self.changeDirection == Direction.NORTH and self.direction != Direction.SOUTH:
-            self.direction = Direction.NORTH
-        elif self.changeDirection == Direction.SOUTH and self.direction != Direction.NORTH:
-            self.direction = Direction.SOUTH
-        elif self.changeDirection == Direction.EAST and self.direction != Direction.WEST:
-            self.direction = Direction.EAST
-        elif self.changeDirection == Direction.WEST and self.direction != Direction.EAST:
-            self.direction = Direction.WEST
-            
-        # Edit snake position based on direction
-        
-        ## unpack x&y from snake head
-        x = self.snakeHead.x
-        y = self.snakeHead.y
-        
-        ## NOTE: Pyglet has reveres y-coord, so north is +y
-        
-        if self.direction == Direction.NORTH:
-            y = y + BLOCK_SIZE # Moves snake up one block
-        elif self.direction == Direction.SOUTH:
-            y = y - BLOCK_SIZE # Moves snake down one block
-        elif self.direction == Direction.WEST:
-            x = x - BLOCK_SIZE # Moves snake left one block
-        elif self.direction == Direction.EAST:
-            x = x + BLOCK_SIZE # Moves snake right one block
-            
-        ## repack x&y into snake head
-        self.snakeHead = Point(x,y)
-        
-    def _updateSnake_G(self):
-        """
-        Adds snake body segments to the snake body graphic 
-        """
-        self.snakeBody_G = []
-        for segment in self.snakeBody:
-            self.snakeBody_G.append(
-                pyglet.shapes.Rectangle(
-                    segment.x, segment.y,
-                    BLOCK_SIZE, BLOCK_SIZE,
-                    RED, batch=self.snake_batch
-                )
-            )
+        rect.position = (self.snakeHead.x, self.snakeHead.y)
+        self.snakeBody_G.appendleft(rect)
             
     def _updateFruit_G(self):
         """
@@ -314,24 +196,3 @@ class SnakeGame(pyglet.window.Window):
         """
         self.fruit_G.x = self.fruit.x
         self.fruit_G.y = self.fruit.y
-        
-    def _agentInput(self, action):
-        """Alternative to handleInputs. Used by the agent to allow the AI to controll the snake.
-
-        Args:
-            action ([int, int, int]): array indicating which direction to turn [straight, right, left]
-        """
-        # Can move straight, turn right, or turn left
-        
-        direction_queue = [Direction.EAST, Direction.SOUTH, Direction.WEST, Direction.NORTH]
-        q_index = direction_queue.index(self.direction)
-        
-        if np.array_equal(action, [1, 0, 0]):
-            self.changeDirection = direction_queue[q_index]
-        elif np.array_equal(action, [0, 1, 0]):
-            next_q_index = (q_index + 1) % 4 # Iterate right w/ no overflow
-            self.changeDirection = direction_queue[next_q_index] # right turn E -> S -> W -> N
-        elif np.array_equal(action, [0, 0, 1]):
-            next_q_index = (q_index - 1) % 4 # Iterate left w/ no overflow
-            self.changeDirection = direction_queue[next_q_index] # left turn E -> N -> W -> S
-        
\ No newline at end of file
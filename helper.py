@@ -1,9 +1,15 @@
-import matplotlib.pyplot as plt
-from IPython import display
+import multiprocessing as mp
+import queue
+import time
+
+# NOTE: matplotlib (and IPython) are only imported when something is actually plotted,
+# so importing this module (or agent) stays cheap for training runs and worker processes
 
-plt.ion()
 
 def plot(scores, mean_scores):
+    import matplotlib.pyplot as plt
+    plt.ion()
+
     plt.clf()
     plt.title('Training...')
     plt.xlabel('Number of Games')
@@ -12,4 +18,66 @@ def plot(scores, mean_scores):
     plt.plot(mean_scores)
     plt.ylim(ymin=0)
     plt.text(len(scores) - 1, scores[-1], str(scores[-1]))
-    plt.text(len(mean_scores) - 1, mean_scores[-1], str(mean_scores[-1]))
\ No newline at end of file
+    plt.text(len(mean_scores) - 1, mean_scores[-1], str(mean_scores[-1]))
+
+
+class LiveDashboard:
+    """Live score plot drawn by a separate process, so neither matplotlib's import nor
+    its drawing ever runs on the training thread. The training side only queues
+    (score, mean score) pairs; the plot is redrawn at most once per interval.
+    """
+
+    def __init__(self, interval=1.0) -> None:
+        """Starts the dashboard process
+
+        Args:
+            interval (float, optional): min seconds between redraws. Defaults to 1.0.
+        """
+        context = mp.get_context('spawn') # no forked copy of the trainer (or its torch threads)
+        self._scores = context.Queue()
+        self._process = context.Process(target=_dashboardLoop, args=(self._scores, interval), daemon=True)
+        self._process.start()
+
+    def update(self, score, mean_score):
+        """Adds a finished game to the plot (never blocks)
+        """
+        if self._process.is_alive():
+            self._scores.put_nowait((score, mean_score))
+
+    def close(self):
+        """Stops the dashboard process
+        """
+        if self._process.is_alive():
+            self._scores.put(None)
+            self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+
+## PRIVATE ##
+
+def _dashboardLoop(scores_queue, interval):
+    """Runs in the dashboard process: collects scores and redraws on a throttle until told to stop
+    """
+    import matplotlib.pyplot as plt
+
+    scores = []
+    meanScores = []
+    drawn = 0
+    lastDraw = 0.0
+    while True:
+        # Take everything waiting, wait a bit if nothing is
+        try:
+            item = scores_queue.get(timeout=interval)
+            while item is not None:
+                scores.append(item[0])
+                meanScores.append(item[1])
+                item = scores_queue.get_nowait()
+            break # None: training is done
+        except queue.Empty:
+            pass
+
+        now = time.monotonic()
+        if len(scores) > drawn and now - lastDraw >= interval:
+            plot(scores, meanScores)
+            drawn, lastDraw = len(scores), now
+        plt.pause(0.01) # keeps the window responsive
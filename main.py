@@ -1,6 +1,7 @@
 from modelManager import AskLoadModel
 from gamePyglet import SnakeGame
 from agent import Agent, AgentTrainer
+from checkpoint import Checkpointer, hasSnapshot, loadSnapshot
 import pyglet
 from pyglet import shapes
 import torch
@@ -14,7 +15,10 @@ if  __name__ == "__main__":
     tagent = Agent(load, path)
     input()
     tgame = SnakeGame()
-    ttrainer = AgentTrainer(tagent, tgame, path)
+    ttrainer = AgentTrainer(tagent, tgame, path, checkpointer=Checkpointer(path, snapshot_on_exit=True))
+    # Pick up where the last session stopped (optimizer, games played, replay memory)
+    if load and hasSnapshot(path):
+        loadSnapshot(ttrainer, path)
         
     # add all functions to run during training
     def update(dt):
@@ -22,6 +26,7 @@ if  __name__ == "__main__":
     
     pyglet.clock.schedule_interval(update, 1/100)
     pyglet.app.run()
+    ttrainer.close() # last checkpoint once the window is closed
     
     
 
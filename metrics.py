@@ -0,0 +1,267 @@
+import csv
+import json
+import math
+import os
+import sys
+import time
+import numpy as np
+
+
+class RollingWindow:
+    """Last N values in a fixed ring buffer, with a running sum for an O(1) mean
+    """
+
+    def __init__(self, size) -> None:
+        self.values = np.zeros(size, dtype=np.float64)
+        self.position = 0
+        self.count = 0
+        self.sum = 0.0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, value):
+        self.sum += float(value - self.values[self.position]) # the slot holds 0 until the window fills
+        self.values[self.position] = value
+        self.position = (self.position + 1) % len(self.values)
+        self.count = min(self.count + 1, len(self.values))
+        if self.position == 0:
+            self.sum = float(self.values.sum()) # drop the float drift once per lap
+
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def max(self):
+        return float(self.values[:self.count].max()) if self.count else 0.0
+
+    def percentile(self, q):
+        return float(np.percentile(self.values[:self.count], q)) if self.count else 0.0
+
+
+class QuantileSketch:
+    """Streaming percentiles over every value seen, in bounded memory (DDSketch style).
+    Values go in log-spaced buckets, so any percentile is off by at most relative_accuracy
+    and the number of buckets only grows with the log of the value range.
+    """
+
+    def __init__(self, relative_accuracy=0.01) -> None:
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.logGamma = math.log(self.gamma)
+        self.buckets = {} # bucket key -> count
+        self.zeros = 0 # values <= 0 (e.g. scores of 0) are counted apart
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self.logGamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100) of every value added
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100 * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class MetricsSink:
+    """Buffered writer of metric records to a compact CSV or JSONL file (picked by extension).
+    Records are kept in memory and written in one go at most once per flush interval.
+    """
+
+    def __init__(self, path, flush_every=10.0) -> None:
+        """Opens the file (appending if it exists)
+
+        Args:
+            path (str): .csv for CSV, anything else for JSON lines
+            flush_every (float, optional): min seconds between writes. Defaults to 10.0.
+        """
+        self.path = path
+        self.csv = path.endswith('.csv')
+        self.flushEvery = flush_every
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self._writeHeader = self.csv and not (os.path.exists(path) and os.path.getsize(path))
+        self._file = open(path, 'a', newline='')
+        self._buffer = []
+        self._lastFlush = time.monotonic()
+
+    def write(self, record):
+        """Queues one record (a flat dict, the same keys every time for CSV)
+        """
+        self._buffer.append(record)
+        if time.monotonic() - self._lastFlush >= self.flushEvery:
+            self.flush()
+
+    def flush(self):
+        """Writes every queued record
+        """
+        if self._buffer:
+            if self.csv:
+                writer = csv.DictWriter(self._file, fieldnames=list(self._buffer[0]))
+                if self._writeHeader:
+                    writer.writeheader()
+                    self._writeHeader = False
+                writer.writerows(self._buffer)
+            else:
+                self._file.writelines(json.dumps(record, separators=(',', ':')) + '\n' for record in self._buffer)
+            self._file.flush()
+            self._buffer.clear()
+        self._lastFlush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def readMetrics(path):
+    """Reads the records written by a MetricsSink (for plotting or an external viewer)
+
+    Args:
+        path (str): .csv or JSON lines file
+
+    Returns:
+        list[dict]: the records, numbers parsed back from CSV
+    """
+    with open(path, newline='') as file:
+        if not path.endswith('.csv'):
+            return [json.loads(line) for line in file if line.strip()]
+        return [{key: _parseNumber(value) for key, value in row.items()} for row in csv.DictReader(file)]
+
+
+class TrainingMetrics:
+    """Training stats in bounded memory: a rolling window of scores, an all-time score sketch,
+    and counters for steps, games, random moves and losses. Summaries go to the console and/or a
+    MetricsSink, at most once per report interval, instead of a line per game.
+    """
+
+    def __init__(self, window=100, report_every=10.0, sink:MetricsSink = None, verbose=True) -> None:
+        """Initializes the counters
+
+        Args:
+            window (int, optional): games in the rolling window. Defaults to 100.
+            report_every (float, optional): min seconds between summaries. Defaults to 10.0.
+            sink (MetricsSink, optional): where summaries are written. Defaults to None.
+            verbose (bool, optional): print summaries. Defaults to True.
+        """
+        self.scores = RollingWindow(window)
+        self.scoreSketch = QuantileSketch()
+        self.losses = RollingWindow(window)
+        self.sink = sink
+        self.verbose = verbose
+        self.reportEvery = report_every
+
+        self.games = 0
+        self.steps = 0
+        self.randomMoves = 0
+        self.lossSum = 0.0
+        self.lossCount = 0
+        self.record = 0
+        self.totalScore = 0
+
+        self._start = self._lastReport = time.monotonic()
+        self._lastSteps = None
+        self._reportedGames = 0
+
+    def onGame(self, score, games, steps, random_moves, loss=None):
+        """Adds a finished game
+
+        Args:
+            score (int): the game's score
+            games (int): total games played so far (this one included)
+            steps (int): total env steps played so far
+            random_moves (int): random moves made during the game
+            loss (float, optional): latest training loss. Defaults to None.
+        """
+        if self._lastSteps is None: # first game, possibly resumed from a snapshot
+            self._lastSteps = 0 if games == 1 else steps
+        self.games = games
+        self.steps = steps
+        self.randomMoves += random_moves
+        self.totalScore += score
+        self.record = max(self.record, score)
+        self.scores.add(score)
+        self.scoreSketch.add(score)
+        if loss is not None:
+            self.losses.add(loss)
+            self.lossSum += loss
+            self.lossCount += 1
+
+        if time.monotonic() - self._lastReport >= self.reportEvery:
+            self.report()
+
+    def summary(self):
+        """Current stats as a flat dict (one row of the metrics file)
+        """
+        now = time.monotonic()
+        return {
+            'time': round(now - self._start, 3),
+            'games': self.games,
+            'steps': self.steps,
+            'stepsPerSecond': round((self.steps - (self._lastSteps or 0)) / max(now - self._lastReport, 1e-9), 1),
+            'record': self.record,
+            'meanScore': round(self.totalScore / self.games, 4) if self.games else 0.0,
+            'windowMean': round(self.scores.mean(), 4),
+            'windowMax': self.scores.max(),
+            'windowP90': self.scores.percentile(90),
+            'p50': round(self.scoreSketch.percentile(50), 2),
+            'p90': round(self.scoreSketch.percentile(90), 2),
+            'randomMoves': self.randomMoves,
+            # No loss at all (e.g. the tabular backend): None, not a misleading 0.0
+            'loss': round(self.losses.mean(), 6) if self.lossCount else None,
+            'meanLoss': round(self.lossSum / self.lossCount, 6) if self.lossCount else None
+        }
+
+    def report(self):
+        """Writes (and prints) a summary now
+        """
+        summary = self.summary()
+        if self.sink:
+            self.sink.write(summary)
+        if self.verbose:
+            print('Game', summary['games'], 'Steps', summary['steps'], 'Steps/s', round(summary['stepsPerSecond']),
+                  'Record', summary['record'], 'Mean', summary['meanScore'], 'Last', len(self.scores), 'mean',
+                  summary['windowMean'], 'max', summary['windowMax'], 'Loss', 'n/a' if summary['loss'] is None else summary['loss'])
+        self._lastReport, self._lastSteps, self._reportedGames = time.monotonic(), self.steps, self.games
+
+    def close(self):
+        """Writes a last summary and closes the sink
+        """
+        if self.games > self._reportedGames:
+            self.report()
+        if self.sink:
+            self.sink.close()
+
+## PRIVATE ##
+
+def _parseNumber(value):
+    if value == '':
+        return None # written for a None field (e.g. no loss yet)
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+# Print the records of a metrics file: "python metrics.py <file> [last N]"
+if __name__ == "__main__":
+
+    records = readMetrics(sys.argv[1])
+    for record in records[-int(sys.argv[2]) if len(sys.argv) > 2 else 0:]:
+        print(' '.join(str(key) + '=' + str(value) for key, value in record.items()))
@@ -4,6 +4,12 @@ import torch.optim as optim
 import torch.nn.functional as F
 import numpy as np
 import os
+import pickle
+import sys
+from checkpoint import atomicSave
+
+# Version of the checkpoint layout written by Linear_QNet.checkpoint()
+MODEL_FORMAT = 1
 
 class Linear_QNet(nn.Module):
     
@@ -14,7 +20,8 @@ class Linear_QNet(nn.Module):
         self.linear1 = nn.Linear(input_size, hidden_size)
         self.linear2 = nn.Linear(hidden_size, output_size)
         
-        self.save(model_filename)
+        # Nothing is written here anymore, checkpoint.Checkpointer saves while training
+        self.model_filename = model_filename
         
     def forward(self, x):
         
@@ -23,16 +30,184 @@ class Linear_QNet(nn.Module):
         
         return x
     
+    def checkpoint(self):
+        """What gets saved: a small header with the format version and layer sizes,
+        plus the weights as a state_dict (plain tensors, no pickled code)
+        """
+        return {
+            'format': MODEL_FORMAT,
+            'inputSize': self.linear1.in_features,
+            'hiddenSize': self.linear1.out_features,
+            'outputSize': self.linear2.out_features,
+            'state_dict': self.state_dict()
+        }
+    
     def save(self,  file_name='model.pth'):
+        """Saves the checkpoint to model/<file_name> right away (temp file + rename).
+        Training loops should use checkpoint.Checkpointer so the write doesn't block them
+        """
         model_folder_path = './model'
-        if not os.path.exists(model_folder_path):
-            os.mkdir(model_folder_path)
-            
         file_name = os.path.join(model_folder_path, file_name)
         
-        torch.save(self, file_name)
+        atomicSave(self.checkpoint(), file_name)
+            
+
+
+def loadQNet(path):
+    """Loads a Linear_QNet checkpoint. Only tensors and plain values are unpickled (weights_only).
+    The file is read, not memory mapped: the Checkpointer replaces this same path while training,
+    which fails on Windows (and pins the old file elsewhere) while a mapping is alive.
+    Legacy checkpoints holding the whole pickled module are converted first (see convertLegacyCheckpoint)
+
+    Args:
+        path (str): path to the checkpoint
+
+    Returns:
+        Linear_QNet: the loaded model
+    """
+    try:
+        checkpoint = torch.load(path, weights_only=True)
+    except pickle.UnpicklingError:
+        print('Converting legacy checkpoint', path)
+        convertLegacyCheckpoint(path)
+        checkpoint = torch.load(path, weights_only=True)
+    
+    if 'format' not in checkpoint:
+        # Bare state_dict, read the layer sizes off the weights
+        stateDict = checkpoint
+        checkpoint = {
+            'format': MODEL_FORMAT,
+            'inputSize': stateDict['linear1.weight'].shape[1],
+            'hiddenSize': stateDict['linear1.weight'].shape[0],
+            'outputSize': stateDict['linear2.weight'].shape[0],
+            'state_dict': stateDict
+        }
+    if checkpoint['format'] > MODEL_FORMAT:
+        raise ValueError('Checkpoint ' + path + ' has a newer format (' + str(checkpoint['format']) + ')')
+    
+    # Build the layers on the meta device (no random init) and adopt the loaded tensors as parameters
+    with torch.device('meta'):
+        model = Linear_QNet(checkpoint['inputSize'], checkpoint['hiddenSize'], checkpoint['outputSize'])
+    model.load_state_dict(checkpoint['state_dict'], assign=True)
+    return model
+
+
+def convertLegacyCheckpoint(path):
+    """One-time conversion of a checkpoint holding a whole pickled Linear_QNet (the old
+    torch.save(model) format) to the weights-only format. The original is kept as <path>.legacy
+
+    NOTE: this unpickles the file, only run it on checkpoints you trust
+
+    Args:
+        path (str): path to the legacy checkpoint
+    """
+    legacy = torch.load(path, weights_only=False)
+    if not isinstance(legacy, nn.Module):
+        return # already weights-only
+    
+    os.replace(path, path + '.legacy')
+    model = Linear_QNet(legacy.linear1.in_features, legacy.linear1.out_features, legacy.linear2.out_features)
+    model.load_state_dict(legacy.state_dict())
+    atomicSave(model.checkpoint(), path)
             
             
+class NumpyQNet:
+    """Inference only copy of a Linear_QNet. Keeps the weights in contiguous NumPy
+    buffers and reuses its work buffers, so a forward pass has no autograd, no torch
+    dispatch and no allocation. Call refresh() after the model's weights change.
+    """
+    
+    def __init__(self, model:Linear_QNet) -> None:
+        
+        self.model = model
+        
+        self.weight1 = np.empty(tuple(model.linear1.weight.shape), dtype=np.float32)
+        self.bias1 = np.empty(tuple(model.linear1.bias.shape), dtype=np.float32)
+        self.weight2 = np.empty(tuple(model.linear2.weight.shape), dtype=np.float32)
+        self.bias2 = np.empty(tuple(model.linear2.bias.shape), dtype=np.float32)
+        
+        # Work buffers for forward()
+        self._x = np.empty(self.weight1.shape[1], dtype=np.float32)
+        self._hidden = np.empty(self.weight1.shape[0], dtype=np.float32)
+        self._q = np.empty(self.weight2.shape[0], dtype=np.float32)
+        
+        self.refresh()
+        
+    def refresh(self):
+        """Copies the model's current weights into the buffers
+        """
+        with torch.no_grad():
+            np.copyto(self.weight1, self.model.linear1.weight.numpy())
+            np.copyto(self.bias1, self.model.linear1.bias.numpy())
+            np.copyto(self.weight2, self.model.linear2.weight.numpy())
+            np.copyto(self.bias2, self.model.linear2.bias.numpy())
+        
+    def forward(self, state):
+        """Q values for one state
+        
+        NOTE: the returned array is a work buffer, overwritten by the next call
+        """
+        np.copyto(self._x, state)
+        
+        np.dot(self.weight1, self._x, out=self._hidden)
+        self._hidden += self.bias1
+        np.maximum(self._hidden, 0, out=self._hidden) # relu
+        
+        np.dot(self.weight2, self._hidden, out=self._q)
+        self._q += self.bias2
+        
+        return self._q
+    
+    def act(self, state) -> int:
+        """Index of the best action for one state
+        """
+        return int(self.forward(state).argmax())
+
+
+class QValueCache:
+    """Q values of every possible state. The state is 11 binary features, so there are
+    only 2048 of them: one batched forward pass fills the whole table and picking the
+    greedy move becomes an array index. Call refresh() after the model's weights change.
+    """
+    
+    def __init__(self, model:Linear_QNet) -> None:
+        
+        self.model = model
+        stateSize = model.linear1.in_features
+        
+        # Every state, in order of its code (feature i is bit i)
+        self.bitValues = 1 << np.arange(stateSize)
+        codes = np.arange(2 ** stateSize)
+        self.states = torch.from_numpy(((codes[:, None] & self.bitValues) > 0).astype(np.float32))
+        
+        self.qValues = np.empty((2 ** stateSize, model.linear2.out_features), dtype=np.float32)
+        self.bestActions = np.empty(2 ** stateSize, dtype=np.int64)
+        
+        self.refresh()
+        
+    def refresh(self):
+        """Recomputes the table with one batched forward pass over every state
+        """
+        with torch.no_grad():
+            np.copyto(self.qValues, self.model(self.states).numpy())
+        np.argmax(self.qValues, axis=1, out=self.bestActions)
+        
+    def code(self, state) -> int:
+        """Index of a state in the table
+        """
+        return int(np.dot(state, self.bitValues))
+    
+    def act(self, state) -> int:
+        """Index of the best action for one state
+        """
+        return int(self.bestActions[self.code(state)])
+    
+    def actBatch(self, states):
+        """Indices of the best actions for a batch of states (n, 11)
+        """
+        return self.bestActions[np.dot(states, self.bitValues)]
+
+
 class QTrainer:
     
     def __init__(self, model, learning_rate, gamma) -> None:
@@ -45,12 +220,24 @@ class QTrainer:
         
         self.criterion = nn.MSELoss()
         
-    def trainStep(self, state, action, reward, next_state, game_over):
+        self.updates = 0 # optimizer steps so far, lets inference copies know when to sync
+        self.lastLoss = None # loss of the last step, left on the tensor so reading it is the caller's cost
+        
+    def trainStep(self, state, action, reward, next_state, game_over, weights=None):
+        """Runs one optimizer step on a single transition or a batch of them
+
+        Args:
+            weights (tensor of float, optional): importance sampling weight per transition. Defaults to None (all 1).
+
+        Returns:
+            tensor of float: absolute TD error of each transition
+        """
         
-        state = torch.tensor(np.array(state), dtype=torch.float)
-        next_state = torch.tensor(np.array(next_state), dtype=torch.float)
-        action = torch.tensor(np.array(action), dtype=torch.long)
-        reward = torch.tensor(np.array(reward), dtype=torch.float)
+        state = torch.as_tensor(state, dtype=torch.float)
+        next_state = torch.as_tensor(next_state, dtype=torch.float)
+        action = torch.as_tensor(action, dtype=torch.long)
+        reward = torch.as_tensor(reward, dtype=torch.float)
+        game_over = torch.as_tensor(game_over, dtype=torch.bool)
         
         if len(state.shape) == 1:
             # Only one number; want in form (1, x)
@@ -59,22 +246,45 @@ class QTrainer:
             next_state = torch.unsqueeze(next_state, 0)
             action = torch.unsqueeze(action, 0)
             reward = torch.unsqueeze(reward, 0)
-            game_over = (game_over,)
+            game_over = torch.unsqueeze(game_over, 0)
+        
+        # Index of the action taken in each row (legacy one-hot rows are converted)
+        if len(action.shape) == 2:
+            action = torch.argmax(action, dim=1)
+        action = torch.unsqueeze(action, 1)
             
         # 1: predicted Q values with current state
         prediction = self.model(state)
         
-        target = prediction.clone()
-        for index in range(len(game_over)):
-            newQ = reward[index]
-            if not game_over[index]:
-                newQ = reward[index] + self.gamma * torch.max(self.model(next_state[index]))
-                
-            target[index][torch.argmax(action).item()] = newQ
+        # 2: new Q = reward + gamma * max(next predicted Q value), just the reward on game over
+        # All next states go through the model in one batch
+        with torch.no_grad():
+            nextQ = self.model(next_state).max(dim=1).values
+            newQ = torch.where(game_over, reward, reward + self.gamma * nextQ)
+            
+            target = prediction.detach().clone()
+            target.scatter_(1, action, newQ.unsqueeze(1))
 
-        # 2: new Q = reward + gamma * max(next predicted Q value)
         self.optimizer.zero_grad()
-        loss = self.criterion(target, prediction) # target -> newQ, prediction = Q
+        if weights is None:
+            loss = self.criterion(target, prediction) # target -> newQ, prediction = Q
+        else:
+            # Same as the MSE loss, with each row scaled by its weight
+            loss = (torch.unsqueeze(weights, 1) * (target - prediction) ** 2).mean()
         loss.backward()
         
-        self.optimizer.step()
\ No newline at end of file
+        self.optimizer.step()
+        self.updates += 1
+        self.lastLoss = loss.detach()
+        
+        # TD errors (only the taken action's column differs between target and prediction)
+        return (target - prediction.detach()).gather(1, action).squeeze(1).abs()
+
+
+# Convert legacy checkpoints with "python model.py [files]" (defaults to every file in model/)
+if __name__ == "__main__":
+    
+    paths = sys.argv[1:] or [os.path.join('model', name) for name in os.listdir('model') if name.endswith('.pth')]
+    for path in paths:
+        convertLegacyCheckpoint(path)
+        print('Converted', path)
@@ -1,4 +1,14 @@
+import argparse
+import fnmatch
+import json
 import os
+import time
+
+MODEL_FOLDER = 'model'
+REGISTRY_FILE = 'registry.json'
+
+# Fields kept per model in the registry, in display order
+REGISTRY_FIELDS = ('record', 'games', 'meanScore', 'params', 'created', 'size')
 
 
 #######################################
@@ -30,9 +40,8 @@ def _query_saved_model():
     
     saved_models = _list_saved_models()
     
-    # List saved models
-    for path in saved_models:
-        print(path)
+    # List saved models, with their stats from the registry
+    _print_models(listModels())
         
     user_in = input('Choose a model to load ("Cancel" to cancel): ')
     
@@ -45,9 +54,127 @@ def _query_saved_model():
         return _query_saved_model()
     
 
-def _list_saved_models() -> list:
+def _list_saved_models(folder=MODEL_FOLDER) -> list:
     
-    return os.listdir('model')
+    # Skip the training snapshot folders (<name>.snapshot/), they go with their model file,
+    # the registry itself, temp files and the backups left by model.convertLegacyCheckpoint
+    return [name for name in os.listdir(folder)
+            if os.path.isfile(os.path.join(folder, name)) and name != REGISTRY_FILE
+            and not name.endswith(('.tmp', '.legacy'))]
+
+
+def _print_models(models):
+    
+    print('Model', '|', ' | '.join(REGISTRY_FIELDS))
+    for entry in models:
+        created = entry['created'] and time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['created']))
+        meanScore = entry['meanScore'] if entry['meanScore'] is None else round(entry['meanScore'], 2)
+        print(entry['name'], '|', entry['record'], '|', entry['games'], '|', meanScore, '|',
+              entry['params'], '|', created, '|', entry['size'])
+    
+
+####################
+
+## Model Registry ##
+
+####################
+
+def loadRegistry(folder=MODEL_FOLDER) -> dict:
+    """Reads the registry index kept next to the checkpoints
+
+    Args:
+        folder (str, optional): checkpoint folder. Defaults to 'model'.
+
+    Returns:
+        dict: model file name -> its stats (see REGISTRY_FIELDS), empty if the index is missing or unreadable
+    """
+    path = os.path.join(folder, REGISTRY_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as file:
+            registry = json.load(file)
+    except (OSError, ValueError) as error:
+        # A corrupt index only loses the stats, the next save writes a fresh one
+        print('Ignoring unreadable registry', path + ':', error)
+        return {}
+    return registry if isinstance(registry, dict) else {}
+
+
+def updateRegistry(name, folder=MODEL_FOLDER, **fields):
+    """Updates one model's entry in the registry (called after each save). The index is
+    rewritten to a temp file and renamed over the old one, so it is never half written
+
+    Args:
+        name (str): model file name in the folder
+        folder (str, optional): checkpoint folder. Defaults to 'model'.
+        **fields: stats to set (record, games, meanScore, params), size is read from the file
+    """
+    registry = loadRegistry(folder)
+    entry = registry.setdefault(name, dict.fromkeys(REGISTRY_FIELDS))
+    if entry['created'] is None:
+        entry['created'] = time.time()
+    entry.update(fields)
+    entry['size'] = os.path.getsize(os.path.join(folder, name))
+
+    path = os.path.join(folder, REGISTRY_FILE)
+    with open(path + '.tmp', 'w') as file:
+        json.dump(registry, file, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def listModels(folder=MODEL_FOLDER, sort_by='record', match=None, min_record=None, min_games=None) -> list:
+    """Lists the saved models with their registry stats, without loading any weights.
+    Models saved before the registry existed are listed with only their file stats
+
+    Args:
+        folder (str, optional): checkpoint folder. Defaults to 'model'.
+        sort_by (str, optional): field to sort by, highest first (None keeps file name order). Defaults to 'record'.
+        match (str, optional): glob pattern on the file name. Defaults to None.
+        min_record (int, optional): only models with at least this record. Defaults to None.
+        min_games (int, optional): only models trained for at least this many games. Defaults to None.
+
+    Returns:
+        list[dict]: one entry per model, with a 'name' key plus REGISTRY_FIELDS
+    """
+    registry = loadRegistry(folder)
+    models = []
+    for name in sorted(_list_saved_models(folder)):
+        path = os.path.join(folder, name)
+        if match and not fnmatch.fnmatch(name, match):
+            continue
+        
+        entry = dict.fromkeys(REGISTRY_FIELDS)
+        entry.update(created=os.path.getctime(path), size=os.path.getsize(path))
+        entry.update(registry.get(name, {}))
+        entry['name'] = name
+        
+        if min_record is not None and (entry['record'] is None or entry['record'] < min_record):
+            continue
+        if min_games is not None and (entry['games'] is None or entry['games'] < min_games):
+            continue
+        models.append(entry)
+    
+    if sort_by:
+        # Unknown stats sort last
+        models.sort(key=lambda entry: (entry[sort_by] is not None, entry[sort_by] or 0), reverse=True)
+    return models
+
+
+def bestModel(by='record', folder=MODEL_FOLDER, **filters):
+    """Picks the saved model with the highest value of a registry field
+
+    Args:
+        by (str, optional): field to rank by. Defaults to 'record'.
+        folder (str, optional): checkpoint folder. Defaults to 'model'.
+        **filters: extra listModels filters (match, min_record, min_games)
+
+    Returns:
+        str: file name of the best model, None if no model has that stat
+    """
+    for entry in listModels(folder, by, **filters):
+        return entry['name'] if entry[by] is not None else None
+    return None
     
     
 ##########################################
@@ -58,4 +185,22 @@ def _list_saved_models() -> list:
 
 def _query_new_model_path() -> str:
     
-    return input('Name of new model: ')
\ No newline at end of file
+    return input('Name of new model: ')
+
+
+# List and pick models without opening them: "python modelManager.py list|best [options]"
+if __name__ == "__main__":
+    
+    parser = argparse.ArgumentParser(description='List or pick saved models using the registry index')
+    parser.add_argument('command', choices=['list', 'best'])
+    parser.add_argument('--sort', default='record', choices=REGISTRY_FIELDS, help='field to sort (or rank) by')
+    parser.add_argument('--match', default=None, help='glob pattern on the model file name')
+    parser.add_argument('--min-record', type=int, default=None, help='only models with at least this record')
+    parser.add_argument('--min-games', type=int, default=None, help='only models trained for at least this many games')
+    args = parser.parse_args()
+    
+    filters = dict(match=args.match, min_record=args.min_record, min_games=args.min_games)
+    if args.command == 'list':
+        _print_models(listModels(sort_by=args.sort, **filters))
+    else:
+        print(bestModel(args.sort, **filters))
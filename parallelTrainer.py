@@ -0,0 +1,217 @@
+import argparse
+import queue
+import time
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from gameNumpy import BatchSnakeGame
+from featurizer import getBatchStates
+from model import Linear_QNet, QTrainer
+from replayMemory import ReplayMemory
+from modelManager import updateRegistry
+
+MAX_MEM = 100_000
+BATCH_SIZE = 1000
+
+LEARN_RATE = 0.001
+GAMMA = 0.9
+
+WARMUP = 10_000 # transitions in memory before the learner starts
+PUBLISH_EVERY = 50 # learner updates between weight pushes to the actors
+CHUNK_STEPS = 16 # env steps an actor batches together before sending
+
+
+def actorEpsilon(worker_id, num_workers) -> float:
+    """Fixed exploration rate per actor, spread from 0.4 down to ~0.0007 (as in Ape-X)
+    so the actors cover both exploration and exploitation
+    """
+    if num_workers == 1:
+        return 0.4
+    return 0.4 ** (1 + 7 * worker_id / (num_workers - 1))
+
+
+def actorLoop(worker_id, num_workers, shared_model, weight_lock, weight_version, transitions, stop, games_per_worker, seed):
+    """Runs headless games with a local copy of the network and sends the transitions to the learner.
+
+    Args:
+        worker_id (int): index of this actor
+        num_workers (int): total number of actors
+        shared_model (Linear_QNet): network in shared memory, published by the learner
+        weight_lock (Lock): held while the shared weights are read or written
+        weight_version (Value): bumped by the learner after each publish
+        transitions (Queue): where chunks of transitions are sent
+        stop (Event): set by the learner to end the run
+        games_per_worker (int): number of games this actor steps at once
+        seed (int): base seed of the run
+    """
+    torch.set_num_threads(1) # actors are cheap, don't oversubscribe the cores
+    rng = np.random.default_rng(seed + worker_id)
+    epsilon = actorEpsilon(worker_id, num_workers)
+
+    model = Linear_QNet(input_size=11, hidden_size=256, output_size=3)
+    version = -1
+
+    game = BatchSnakeGame(games_per_worker, seed=seed + worker_id)
+    states = getBatchStates(game)
+
+    while not stop.is_set():
+        chunk = []
+        for _ in range(CHUNK_STEPS):
+            # Pull fresh weights when the learner has published some
+            if weight_version.value != version:
+                with weight_lock:
+                    version = weight_version.value
+                    model.load_state_dict(shared_model.state_dict())
+
+            # Greedy moves from the local network, random moves with probability epsilon
+            with torch.no_grad():
+                actions = torch.argmax(model(torch.from_numpy(states).float()), dim=1).numpy()
+            explore = rng.random(games_per_worker) < epsilon
+            actions[explore] = rng.integers(0, 3, size=explore.sum())
+
+            rewards, dones, scores = game.step(actions)
+            nextStates = getBatchStates(game)
+
+            chunk.append((states, actions.astype(np.int8), rewards, nextStates, dones, scores[dones]))
+            states = nextStates
+
+        transitions.put(tuple(np.concatenate(parts) for parts in zip(*chunk)))
+
+
+class ParallelTrainer:
+    """Actor/learner training. Worker processes play headless games and feed
+    transitions to the learner, which runs QTrainer updates on the central replay memory
+    and periodically publishes its weights back to the workers.
+    """
+
+    def __init__(self, num_workers, games_per_worker=64, model_filename=None, seed=0) -> None:
+        """Initializes the learner's model, trainer and memory
+
+        Args:
+            num_workers (int): number of actor processes
+            games_per_worker (int, optional): games each actor steps at once. Defaults to 64.
+            model_filename (str, optional): file name in the model/ dir to save the model to. Defaults to None.
+            seed (int, optional): base seed for the actors. Defaults to 0.
+        """
+        self.numWorkers = num_workers
+        self.gamesPerWorker = games_per_worker
+        self.model_path = model_filename
+        self.seed = seed
+
+        self.model = Linear_QNet(input_size=11, hidden_size=256, output_size=3)
+        self.trainer = QTrainer(self.model, LEARN_RATE, GAMMA)
+        self.memory = ReplayMemory(MAX_MEM)
+
+        # Copy of the weights the actors read from
+        self.sharedModel = Linear_QNet(input_size=11, hidden_size=256, output_size=3)
+        self.sharedModel.load_state_dict(self.model.state_dict())
+        self.sharedModel.share_memory()
+
+        self.envSteps = 0
+        self.updates = 0
+        self.numGames = 0
+        self.totalScore = 0
+        self.record = 0
+
+    def run(self, seconds, report_every=5.0):
+        """Runs actors and learner for a fixed amount of wall-clock time
+
+        Args:
+            seconds (float): how long to train
+            report_every (float, optional): seconds between throughput prints. Defaults to 5.0.
+        """
+        context = mp.get_context('spawn')
+        weightLock = context.Lock()
+        weightVersion = context.Value('i', 0)
+        transitions = context.Queue(maxsize=4 * self.numWorkers)
+        stop = context.Event()
+
+        workers = [
+            context.Process(
+                target=actorLoop,
+                args=(worker_id, self.numWorkers, self.sharedModel, weightLock, weightVersion,
+                      transitions, stop, self.gamesPerWorker, self.seed),
+                daemon=True
+            )
+            for worker_id in range(self.numWorkers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        start = lastReport = time.perf_counter()
+        lastSteps = lastUpdates = 0
+        try:
+            while time.perf_counter() - start < seconds:
+                self._drain(transitions)
+
+                if len(self.memory) < WARMUP:
+                    time.sleep(0.001)
+                    continue
+
+                # Learner update
+                self.trainer.trainStep(*self.memory.sample(BATCH_SIZE))
+                self.updates += 1
+
+                if self.updates % PUBLISH_EVERY == 0:
+                    with weightLock:
+                        self.sharedModel.load_state_dict(self.model.state_dict())
+                        weightVersion.value += 1
+
+                now = time.perf_counter()
+                if now - lastReport >= report_every:
+                    elapsed = now - lastReport
+                    print('Steps/s', round((self.envSteps - lastSteps) / elapsed),
+                          'Updates/s', round((self.updates - lastUpdates) / elapsed),
+                          'Games', self.numGames, 'Record', self.record,
+                          'Average', round(self.totalScore / max(self.numGames, 1), 2))
+                    lastReport, lastSteps, lastUpdates = now, self.envSteps, self.updates
+        finally:
+            stop.set()
+            # Keep draining so no actor blocks on a full queue while shutting down
+            while any(worker.is_alive() for worker in workers):
+                self._drain(transitions, timeout=0.1)
+            for worker in workers:
+                worker.join()
+
+        if self.model_path:
+            self.model.save(self.model_path)
+            updateRegistry(self.model_path, record=self.record, games=self.numGames,
+                           meanScore=self.totalScore / max(self.numGames, 1),
+                           params=sum(parameter.numel() for parameter in self.model.parameters()))
+
+    ## PRIVATE ##
+
+    def _drain(self, transitions, timeout=None):
+        """Moves every waiting chunk from the queue into the replay memory
+        """
+        while True:
+            try:
+                if timeout is None:
+                    chunk = transitions.get_nowait()
+                else:
+                    chunk = transitions.get(timeout=timeout)
+            except queue.Empty:
+                return
+
+            states, actions, rewards, nextStates, dones, scores = chunk
+            self.memory.appendBatch(states, actions, rewards, nextStates, dones)
+            self.envSteps += len(rewards)
+
+            self.numGames += len(scores)
+            self.totalScore += int(scores.sum())
+            if len(scores):
+                self.record = max(self.record, int(scores.max()))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Train with parallel actor processes and a central learner')
+    parser.add_argument('--workers', type=int, default=mp.cpu_count() - 1)
+    parser.add_argument('--games-per-worker', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--model', default=None, help='file name in the model/ dir to save to')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    trainer = ParallelTrainer(max(args.workers, 1), args.games_per_worker, args.model, args.seed)
+    trainer.run(args.seconds)
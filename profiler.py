@@ -0,0 +1,181 @@
+import json
+import time
+import numpy as np
+
+# All-run histograms: 4 buckets per doubling of the duration in ns (up to ~2^64 ns)
+BUCKETS_PER_DOUBLING = 4
+NUM_BUCKETS = 64 * BUCKETS_PER_DOUBLING
+
+
+class PhaseProfiler:
+    """Times the phases of each training step with a monotonic clock (perf_counter_ns).
+    Each phase costs one clock read and one list append; the durations are only turned into
+    stats every N steps (per-window percentiles plus an all-run histogram), and the first
+    events of the run can be exported as a Chrome trace (chrome://tracing, Perfetto).
+
+    Use: startStep(), then lap('phase') after each phase, then endStep().
+    """
+
+    def __init__(self, window=10_000, trace_path=None, max_trace_events=200_000, verbose=True) -> None:
+        """Initializes an empty profile
+
+        Args:
+            window (int, optional): steps per aggregation window. Defaults to 10_000.
+            trace_path (str, optional): where close() writes the Chrome trace JSON. Defaults to None (no trace).
+            max_trace_events (int, optional): events kept for the trace, later ones are dropped. Defaults to 200_000.
+            verbose (bool, optional): print a line per window and the summary table on close. Defaults to True.
+        """
+        self.window = window
+        self.tracePath = trace_path
+        self.maxTraceEvents = max_trace_events
+        self.verbose = verbose
+
+        self.steps = 0
+        self.phases = {} # phase -> durations (ns) in the current window
+        self.histograms = {} # phase -> all-run bucket counts
+        self.totals = {} # phase -> (calls, total ns, max ns) over the run
+        self.windows = [] # per window: (step, end time in us, {phase: (mean, p50, p99, max) in us})
+
+        self.traceEvents = [] # (phase, start ns, duration ns), turned into trace events on write
+        self._origin = time.perf_counter_ns()
+        self._stepStart = self._last = self._origin
+
+    def startStep(self):
+        self._stepStart = self._last = time.perf_counter_ns()
+
+    def lap(self, phase):
+        """Ends a phase: records the time since the last lap (or the step start)
+        """
+        now = time.perf_counter_ns()
+        self._record(phase, self._last, now)
+        self._last = now
+
+    def endStep(self):
+        """Records the whole step and aggregates the window every N steps
+        """
+        self._record('step', self._stepStart, time.perf_counter_ns())
+        self.steps += 1
+        if self.steps % self.window == 0:
+            self._aggregate()
+
+    def summary(self):
+        """Per phase stats over the whole run (percentiles from the histograms)
+
+        Returns:
+            list[dict]: one row per phase, slowest total first
+        """
+        stepTotal = self.totals.get('step', (0, 0, 0))[1]
+        rows = []
+        for phase, (calls, total, longest) in self.totals.items():
+            histogram = self.histograms[phase]
+            rows.append({
+                'phase': phase,
+                'calls': calls,
+                'total ms': total / 1e6,
+                'share %': 100 * total / stepTotal if stepTotal else 0.0,
+                'mean us': total / calls / 1e3,
+                'p50 us': min(_histogramPercentile(histogram, 50), longest) / 1e3,
+                'p99 us': min(_histogramPercentile(histogram, 99), longest) / 1e3,
+                'max us': longest / 1e3
+            })
+        rows.sort(key=lambda row: row['total ms'], reverse=True)
+        return rows
+
+    def printSummary(self):
+        rows = self.summary()
+        if not rows:
+            return
+        print(' | '.join(rows[0]))
+        for row in rows:
+            print(' | '.join(str(round(value, 2)) if isinstance(value, float) else str(value) for value in row.values()))
+
+    def writeTrace(self, path):
+        """Writes the Chrome trace: one complete event per recorded phase, plus per-window
+        p50/p99 counters for every phase so regressions show up on the timeline
+        """
+        events = [{'name': phase, 'ph': 'X', 'pid': 0, 'tid': 0, 'ts': (start - self._origin) / 1e3, 'dur': duration / 1e3}
+                  for phase, start, duration in self.traceEvents]
+        for step, end, stats in self.windows:
+            for phase, (mean, p50, p99, longest) in stats.items():
+                events.append({'name': phase, 'ph': 'C', 'ts': end, 'pid': 0, 'tid': 1,
+                               'args': {'p50 us': p50, 'p99 us': p99}})
+
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ns',
+                       'otherData': {'steps': self.steps, 'summary': self.summary()}}, file)
+
+    def close(self):
+        """Aggregates the last partial window, prints the summary and writes the trace
+        """
+        self._aggregate()
+        if self.verbose:
+            self.printSummary()
+        if self.tracePath:
+            self.writeTrace(self.tracePath)
+
+    ## PRIVATE ##
+
+    def _record(self, phase, start, end):
+        durations = self.phases.get(phase)
+        if durations is None:
+            durations = self.phases[phase] = []
+        durations.append(end - start)
+
+        if len(self.traceEvents) < self.maxTraceEvents:
+            self.traceEvents.append((phase, start, end - start))
+
+    def _aggregate(self):
+        """Folds the window's durations into the run totals and histograms, and keeps its percentiles
+        """
+        stats = {}
+        for phase, durations in self.phases.items():
+            if not durations:
+                continue
+            durations = np.array(durations, dtype=np.int64)
+
+            calls, total, longest = self.totals.get(phase, (0, 0, 0))
+            self.totals[phase] = (calls + len(durations), total + int(durations.sum()), max(longest, int(durations.max())))
+
+            buckets = np.floor(np.log2(np.maximum(durations, 1)) * BUCKETS_PER_DOUBLING).astype(np.int64)
+            histogram = self.histograms.setdefault(phase, np.zeros(NUM_BUCKETS, dtype=np.int64))
+            histogram += np.bincount(np.minimum(buckets, NUM_BUCKETS - 1), minlength=NUM_BUCKETS)
+
+            p50, p99 = np.percentile(durations, [50, 99]) / 1e3
+            stats[phase] = (durations.mean() / 1e3, p50, p99, durations.max() / 1e3)
+        self.phases = {phase: [] for phase in self.phases}
+
+        if not stats:
+            return
+        if self.verbose:
+            print('Profile @ step', self.steps, '(p50/p99 us):',
+                  ', '.join(phase + ' ' + str(round(p50, 1)) + '/' + str(round(p99, 1))
+                            for phase, (mean, p50, p99, longest) in stats.items()))
+        self.windows.append((self.steps, (time.perf_counter_ns() - self._origin) / 1e3, stats))
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off: every call does nothing
+    """
+
+    def startStep(self):
+        pass
+
+    def lap(self, phase):
+        pass
+
+    def endStep(self):
+        pass
+
+    def close(self):
+        pass
+
+## PRIVATE ##
+
+def _histogramPercentile(histogram, q):
+    """Upper edge (ns) of the bucket holding the q-th percentile
+    """
+    counts = np.cumsum(histogram)
+    if not counts[-1]:
+        return 0.0
+    bucket = int(np.searchsorted(counts, q / 100 * counts[-1]))
+    return 2 ** ((bucket + 1) / BUCKETS_PER_DOUBLING)
@@ -0,0 +1,352 @@
+import json
+import os
+import torch
+import numpy as np
+from gameHeadless import toActionIndex
+
+ARRAY_NAMES = ('states', 'actions', 'rewards', 'nextStates', 'gameOvers')
+
+
+
+class ReplayMemory:
+    """Fixed size replay memory backed by preallocated NumPy arrays.
+    Acts as a ring buffer: once full, the oldest transitions are overwritten.
+    """
+
+    def __init__(self, capacity, state_size=11, seed=None) -> None:
+        """Initializes the memory arrays
+
+        Args:
+            capacity (int): max number of transitions kept
+            state_size (int, optional): number of features in a state. Defaults to 11.
+            seed (int, optional): seed for the batch sampling. Defaults to None.
+        """
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+
+        self.states = np.zeros((capacity, state_size), dtype=np.uint8)
+        self.actions = np.zeros(capacity, dtype=np.int8) # action index
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.nextStates = np.zeros((capacity, state_size), dtype=np.uint8)
+        self.gameOvers = np.zeros(capacity, dtype=bool)
+
+        self.position = 0 # next slot to write
+        self.size = 0
+
+        # Output buffers reused by every sample call (grown on demand)
+        self._batch = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, state, action, reward, next_state, game_over):
+        """Stores one transition, overwriting the oldest one if the memory is full
+
+        Args:
+            state (state array): the current state of the game
+            action (int): the action took this step [0=straight, 1=right, 2=left] (a legacy one-hot list also works)
+            reward (int): the reward for the action of this step
+            next_state (state array): the next state of the game
+            game_over (bool): whether or not the game ended
+        """
+        index = self.position
+        self.states[index] = state
+        self.actions[index] = toActionIndex(action)
+        self.rewards[index] = reward
+        self.nextStates[index] = next_state
+        self.gameOvers[index] = game_over
+
+        self.position = (index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def appendBatch(self, states, actions, rewards, next_states, game_overs):
+        """Stores many transitions at once, overwriting the oldest ones if the memory is full
+
+        Args:
+            states (array (n, state_size)): the states of the games
+            actions (array (n,)): the action indices took (or legacy one-hot rows, (n, 3))
+            rewards (array (n,)): the rewards for the actions
+            next_states (array (n, state_size)): the next states of the games
+            game_overs (array (n,)): whether or not each game ended
+
+        Returns:
+            array of int: the memory slots written
+        """
+        actions = np.asarray(actions)
+        if actions.ndim == 2:
+            actions = actions.argmax(axis=1) # legacy one-hot rows
+        count = len(rewards)
+        indices = (self.position + np.arange(count)) % self.capacity
+        self.states[indices] = states
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.nextStates[indices] = next_states
+        self.gameOvers[indices] = game_overs
+
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+        return indices
+
+    def sample(self, batch_size):
+        """Samples a random batch of transitions (uniform, with replacement).
+        If the memory holds no more than batch_size transitions, all of them are returned.
+
+        NOTE: the returned tensors share memory with internal buffers and are
+        overwritten by the next call to sample
+
+        Args:
+            batch_size (int): number of transitions to sample
+
+        Returns:
+            (states, actions, rewards, next_states, game_overs): torch tensors for the batch
+        """
+        if self.size > batch_size:
+            indices = self.rng.integers(0, self.size, size=batch_size)
+        else:
+            indices = np.arange(self.size)
+
+        return self._gather(indices)
+
+    def save(self, folder):
+        """Writes the memory to a folder: one .npy file per array plus memory.json
+        with the ring position, size and sampling RNG state
+
+        Args:
+            folder (str): folder to write to (created if missing)
+        """
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(folder, name + '.npy'), getattr(self, name))
+
+        with open(os.path.join(folder, 'memory.json'), 'w') as file:
+            json.dump(self._header(), file)
+
+    def load(self, folder):
+        """Restores a memory written by save(). The arrays are read into memory rather than
+        mapped, so the folder can be replaced or deleted right after (see checkpoint.saveSnapshot)
+
+        Args:
+            folder (str): folder written by save()
+        """
+        with open(os.path.join(folder, 'memory.json')) as file:
+            header = json.load(file)
+
+        for name in ARRAY_NAMES:
+            setattr(self, name, np.load(os.path.join(folder, name + '.npy')))
+        self._restoreHeader(header)
+        self._batch = None
+
+    ## PRIVATE ##
+
+    def _header(self):
+        """Everything but the arrays needed to resume the memory
+        """
+        return {
+            'type': type(self).__name__,
+            'capacity': self.capacity,
+            'position': self.position,
+            'size': self.size,
+            'rng': self.rng.bit_generator.state
+        }
+
+    def _restoreHeader(self, header):
+        self.capacity = header['capacity']
+        self.position = header['position']
+        self.size = header['size']
+        self.rng.bit_generator.state = header['rng']
+
+    def _gather(self, indices):
+        """Copies the given transitions into the output buffers and wraps them as tensors
+        """
+        count = len(indices)
+        if self._batch is None or len(self._batch[0]) < count:
+            self._batch = tuple(
+                np.empty((count,) + array.shape[1:], dtype=array.dtype)
+                for array in (self.states, self.actions, self.rewards, self.nextStates, self.gameOvers)
+            )
+
+        batch = []
+        for array, out in zip((self.states, self.actions, self.rewards, self.nextStates, self.gameOvers), self._batch):
+            np.take(array, indices, axis=0, out=out[:count])
+            batch.append(torch.from_numpy(out[:count]))
+
+        return tuple(batch)
+
+
+class SumTree:
+    """Binary tree where every node holds the sum of its children's priorities.
+    Leaves map one to one to memory slots, so sampling a slot proportionally to its
+    priority and updating a priority are both O(log n).
+    """
+
+    def __init__(self, capacity) -> None:
+        """Initializes an empty tree
+
+        Args:
+            capacity (int): number of leaves (memory slots)
+        """
+        # Round up to a power of two so every leaf sits at the same depth
+        self.depth = max(1, int(np.ceil(np.log2(capacity))))
+        self.leafStart = 2 ** self.depth
+        # 1-indexed heap layout: root at 1, children of i at 2i and 2i + 1
+        self.tree = np.zeros(2 * self.leafStart, dtype=np.float64)
+
+    def total(self) -> float:
+        return self.tree[1]
+
+    def get(self, indices):
+        """Gets the priorities stored at the given leaves
+        """
+        return self.tree[self.leafStart + indices]
+
+    def update(self, indices, priorities):
+        """Sets the priorities of the given leaves and refreshes the sums above them
+
+        Args:
+            indices (array of int): leaf indices
+            priorities (array of float): new priorities
+        """
+        nodes = self.leafStart + np.asarray(indices)
+        self.tree[nodes] = priorities
+
+        # Walk up one level at a time, recomputing every touched parent from its children
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        """Finds the leaves whose cumulative priority range contains each value
+
+        Args:
+            values (array of float): values in [0, total)
+
+        Returns:
+            array of int: leaf indices
+        """
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+
+        for _ in range(self.depth):
+            left = 2 * nodes
+            goRight = values >= self.tree[left]
+            values -= np.where(goRight, self.tree[left], 0)
+            nodes = left + goRight
+
+        return nodes - self.leafStart
+
+
+class PrioritizedReplayMemory(ReplayMemory):
+    """Replay memory that samples transitions proportionally to their TD error
+    (prioritized experience replay), with importance sampling weights to correct the bias.
+    """
+
+    def __init__(self, capacity, alpha=0.6, beta=0.4, beta_increment=0.001, epsilon=0.01, state_size=11, seed=None) -> None:
+        """Initializes the memory arrays and the priority tree
+
+        Args:
+            capacity (int): max number of transitions kept
+            alpha (float, optional): how strongly priorities shape sampling (0 = uniform). Defaults to 0.6.
+            beta (float, optional): starting strength of the importance sampling correction. Defaults to 0.4.
+            beta_increment (float, optional): beta increase per sample call, up to 1. Defaults to 0.001.
+            epsilon (float, optional): added to TD errors so no transition gets zero priority. Defaults to 0.01.
+            state_size (int, optional): number of features in a state. Defaults to 11.
+            seed (int, optional): seed for the batch sampling. Defaults to None.
+        """
+        super().__init__(capacity, state_size, seed)
+
+        self.alpha = alpha
+        self.beta = beta
+        self.betaIncrement = beta_increment
+        self.epsilon = epsilon
+
+        self.tree = SumTree(capacity)
+        self.maxPriority = 1.0 # new transitions get the highest priority seen so far
+
+    def append(self, state, action, reward, next_state, game_over):
+        """Stores one transition with max priority, overwriting the oldest one if the memory is full
+        """
+        index = self.position
+        super().append(state, action, reward, next_state, game_over)
+        self.tree.update([index], [self.maxPriority])
+
+    def appendBatch(self, states, actions, rewards, next_states, game_overs):
+        """Stores many transitions at once with max priority
+        """
+        indices = super().appendBatch(states, actions, rewards, next_states, game_overs)
+        self.tree.update(indices, np.full(len(indices), self.maxPriority))
+        return indices
+
+    def sample(self, batch_size):
+        """Samples a batch of transitions proportionally to their priority.
+        Uses one stratified draw per segment of the total priority.
+
+        Args:
+            batch_size (int): number of transitions to sample (capped at the memory size)
+
+        Returns:
+            (states, actions, rewards, next_states, game_overs, indices, weights):
+            the batch tensors, the sampled memory slots and their importance sampling weights
+        """
+        count = min(batch_size, self.size)
+        segment = self.tree.total() / count
+        values = (np.arange(count) + self.rng.random(count)) * segment
+
+        indices = self.tree.find(values)
+        # Float rounding can land past the filled slots
+        np.minimum(indices, self.size - 1, out=indices)
+
+        # Importance sampling weights, normalized so the largest is 1
+        probabilities = self.tree.get(indices) / self.tree.total()
+        weights = (self.size * probabilities) ** -self.beta
+        weights /= weights.max()
+        self.beta = min(1.0, self.beta + self.betaIncrement)
+
+        return self._gather(indices) + (indices, torch.from_numpy(weights.astype(np.float32)))
+
+    def updatePriorities(self, indices, td_errors):
+        """Sets new priorities for sampled transitions from their TD errors
+
+        Args:
+            indices (array of int): memory slots returned by sample
+            td_errors (array or tensor of float): absolute TD error of each transition
+        """
+        priorities = (np.asarray(td_errors, dtype=np.float64) + self.epsilon) ** self.alpha
+        self.maxPriority = max(self.maxPriority, priorities.max())
+        self.tree.update(indices, priorities)
+
+    def save(self, folder):
+        """Writes the memory and its priority tree to a folder (see ReplayMemory.save)
+        """
+        super().save(folder)
+        np.save(os.path.join(folder, 'priorities.npy'), self.tree.tree)
+
+    def load(self, folder):
+        """Restores a memory and its priority tree written by save() (see ReplayMemory.load).
+        A uniform memory's folder also loads: every stored transition gets max priority
+        """
+        super().load(folder)
+        self.tree = SumTree(self.capacity)
+        prioritiesPath = os.path.join(folder, 'priorities.npy')
+        if os.path.exists(prioritiesPath):
+            self.tree.tree = np.load(prioritiesPath)
+        else:
+            self.tree.update(np.arange(self.size), np.full(self.size, self.maxPriority))
+
+    ## PRIVATE ##
+
+    def _header(self):
+        header = super()._header()
+        header.update(alpha=self.alpha, beta=self.beta, betaIncrement=self.betaIncrement,
+                      epsilon=self.epsilon, maxPriority=float(self.maxPriority))
+        return header
+
+    def _restoreHeader(self, header):
+        # A uniform memory's header has none of these, the current settings are kept
+        super()._restoreHeader(header)
+        self.alpha = header.get('alpha', self.alpha)
+        self.beta = header.get('beta', self.beta)
+        self.betaIncrement = header.get('betaIncrement', self.betaIncrement)
+        self.epsilon = header.get('epsilon', self.epsilon)
+        self.maxPriority = header.get('maxPriority', self.maxPriority)
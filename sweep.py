@@ -0,0 +1,329 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import statistics
+import tempfile
+import time
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Config keys passed to Agent and to AgentTrainer
+AGENT_PARAMS = ('learning_rate', 'batch_size', 'max_mem', 'randomness', 'rand_decay', 'gamma', 'hidden_size', 'prioritized')
+TRAINER_PARAMS = ('train_every', 'updates_per_train', 'warmup', 'short_mem')
+
+# Early stopping defaults
+RUNGS = 10 # checks per job, evenly spread over its step budget
+MIN_RUNG = 3 # no job is stopped before this check
+MIN_PEERS = 4 # configs that must have reached a check before it can stop one
+STOP_QUANTILE = 0.25 # configs whose mean is below this quantile of all configs' means are stopped
+
+
+def gridConfigs(grid):
+    """Every combination of a grid spec
+
+    Args:
+        grid (dict): parameter -> list of values
+
+    Returns:
+        list[dict]: one config per combination
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def randomConfigs(space, samples, seed=0):
+    """Random configs drawn from a search space
+
+    Args:
+        space (dict): parameter -> list of choices, {'uniform': [low, high]}, {'log': [low, high]} or {'int': [low, high]}
+        samples (int): number of configs
+        seed (int, optional): seed for the draws. Defaults to 0.
+
+    Returns:
+        list[dict]: the configs
+    """
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(samples):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, list):
+                config[name] = rng.choice(values)
+            elif 'uniform' in values:
+                config[name] = rng.uniform(*values['uniform'])
+            elif 'log' in values:
+                low, high = values['log']
+                config[name] = math.exp(rng.uniform(math.log(low), math.log(high)))
+            elif 'int' in values:
+                config[name] = rng.randint(*values['int'])
+            else:
+                raise ValueError('Unknown distribution for ' + name + ': ' + str(values))
+        configs.append(config)
+    return configs
+
+
+def specConfigs(spec):
+    """Configs of a sweep spec: {'grid': {...}} or {'random': {...}, 'samples': n, 'seed': s}
+    """
+    if 'grid' in spec:
+        configs = gridConfigs(spec['grid'])
+    elif 'random' in spec:
+        configs = randomConfigs(spec['random'], spec.get('samples', 20), spec.get('seed', 0))
+    else:
+        raise ValueError("A sweep spec needs a 'grid' or a 'random' section")
+
+    for config in configs:
+        unknown = set(config) - set(AGENT_PARAMS) - set(TRAINER_PARAMS)
+        if unknown:
+            raise ValueError('Unknown sweep parameters: ' + ', '.join(sorted(unknown)))
+    return configs
+
+
+def isLosing(config_scores, config_id, quantile=STOP_QUANTILE, min_peers=MIN_PEERS):
+    """Whether a config is clearly losing at a check: the mean rolling score of its seeds
+    that reached the check is below the given quantile of every config's mean there
+
+    Args:
+        config_scores (dict): config id -> rolling means its seeds reported at the check
+        config_id (int): config to judge
+        quantile (float, optional): quantile (0-1) of the configs' means to beat. Defaults to STOP_QUANTILE.
+        min_peers (int, optional): configs needed at the check to stop any. Defaults to MIN_PEERS.
+
+    Returns:
+        bool: whether the config should be stopped
+    """
+    if len(config_scores) < min_peers:
+        return False
+    means = {config: statistics.fmean(scores) for config, scores in config_scores.items()}
+    return means[config_id] < _quantile(sorted(means.values()), quantile)
+
+
+def runJob(job, config_id, config, seed, steps, window, rung_scores, stopped_configs, lock, rungs=RUNGS,
+           min_rung=MIN_RUNG, min_peers=MIN_PEERS, stop_quantile=STOP_QUANTILE):
+    """Trains one headless agent on one config (runs in a pool process)
+
+    Args:
+        job (int): job number
+        config_id (int): index of the config, shared by its seeds
+        config (dict): Agent and AgentTrainer parameters
+        seed (int): seed for the game, agent and model
+        steps (int): env step budget
+        window (int): games in the rolling score window
+        rung_scores (dict proxy): rung -> {config id: rolling means its seeds reported there} (shared)
+        stopped_configs (dict proxy): config id -> step it was stopped at (shared)
+        lock (lock proxy): guards rung_scores and stopped_configs
+        rungs, min_rung, min_peers (int, optional): early stopping settings
+        stop_quantile (float, optional): see isLosing
+
+    Returns:
+        dict: one row of the results table
+    """
+    # Imported here so the parent process stays light (it never trains)
+    import numpy as np
+    import torch
+    from agent import Agent, AgentTrainer
+    from checkpoint import Checkpointer
+    from gameHeadless import HeadlessSnakeGame
+    from metrics import TrainingMetrics
+
+    torch.set_num_threads(1) # the pool runs one job per core
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+    row = {'job': job, 'config': config_id, 'seed': seed, **config, 'status': 'done', 'steps': 0, 'games': 0,
+           'record': 0, 'meanScore': 0.0, 'rollingMean': 0.0, 'stoppedAt': None, 'seconds': 0.0}
+    start = time.perf_counter()
+    cwd = os.getcwd()
+    trainer = None
+    # Pool processes run many jobs: the temp dir, the cwd and the checkpoint writer thread
+    # are all handed back before the next one
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder) # nothing lands in the repo's model/ dir
+        try:
+            agentKwargs = {name: value for name, value in config.items() if name in AGENT_PARAMS}
+            trainerKwargs = {name: value for name, value in config.items() if name in TRAINER_PARAMS}
+            agent = Agent(False, 'sweep.pth', seed=seed, **agentKwargs)
+            trainer = AgentTrainer(agent, HeadlessSnakeGame(), 'sweep.pth', **trainerKwargs,
+                                   checkpointer=Checkpointer('sweep.pth', on_record=False, on_exit=False),
+                                   metrics=TrainingMetrics(window, verbose=False))
+
+            rungSteps = max(1, steps // rungs)
+            for step in range(1, steps + 1):
+                trainer.train()
+                if step % rungSteps or step == steps:
+                    continue
+
+                # Early stopping per config: once a config's mean over its seeds is in the bottom
+                # quantile of every config at a check, all its seeds stop at their next check
+                rung = step // rungSteps
+                rollingMean = trainer.metrics.scores.mean()
+                with lock:
+                    configScores = rung_scores.get(rung, {})
+                    configScores.setdefault(config_id, []).append(rollingMean)
+                    rung_scores[rung] = configScores # proxies only see reassignments
+                    if rung >= min_rung and config_id not in stopped_configs and \
+                            isLosing(configScores, config_id, stop_quantile, min_peers):
+                        stopped_configs[config_id] = step
+                    stop = config_id in stopped_configs
+                if stop:
+                    row['status'] = 'stopped'
+                    row['stoppedAt'] = step
+                    break
+
+            row.update(steps=trainer.steps, games=agent.num_games, record=trainer.record,
+                       meanScore=trainer.totalScore / max(agent.num_games, 1), rollingMean=trainer.metrics.scores.mean())
+        except Exception:
+            row['status'] = 'failed'
+            traceback.print_exc()
+        finally:
+            if trainer is not None:
+                trainer.close()
+            os.chdir(cwd)
+    row['seconds'] = round(time.perf_counter() - start, 1)
+    return row
+
+
+def runSweep(configs, steps, workers=None, seeds=1, base_seed=0, window=100, **stopping):
+    """Runs every config (times seeds) across a process pool
+
+    Args:
+        configs (list[dict]): configs to train
+        steps (int): env step budget per job
+        workers (int, optional): pool processes. Defaults to the number of CPUs.
+        seeds (int, optional): jobs per config, each with its own seed. Defaults to 1.
+        base_seed (int, optional): every config runs on seeds base_seed to base_seed + seeds - 1. Defaults to 0.
+        window (int, optional): games in the rolling score window. Defaults to 100.
+        **stopping: early stopping settings for runJob (rungs, min_rung, min_peers, stop_quantile)
+
+    Returns:
+        list[dict]: one row per job, the ones that ran their full budget first (best rolling mean first)
+    """
+    # Every config runs on the same seeds, so configs are compared on the same games
+    jobs = [(configId, config, base_seed + seedIndex)
+            for configId, config in enumerate(configs) for seedIndex in range(seeds)]
+
+    context = mp.get_context('spawn') # torch doesn't like being forked
+    with context.Manager() as manager, ProcessPoolExecutor(workers, mp_context=context) as pool:
+        rungScores = manager.dict()
+        stoppedConfigs = manager.dict()
+        lock = manager.Lock()
+        futures = [pool.submit(runJob, job, configId, config, seed, steps, window, rungScores, stoppedConfigs, lock,
+                               **stopping)
+                   for job, (configId, config, seed) in enumerate(jobs)]
+
+        rows = []
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            print('Job', row['job'], row['status'], 'after', row['steps'], 'steps, rolling mean',
+                  round(row['rollingMean'], 2), '(' + str(len(rows)) + '/' + str(len(jobs)) + ')', flush=True)
+
+    # A stopped job's rolling mean is from fewer steps, so it never ranks above a finished one
+    rows.sort(key=lambda row: (row['status'] == 'done', row['rollingMean']), reverse=True)
+    return rows
+
+
+def configResults(rows):
+    """Aggregates the job rows of runSweep over seeds, one row per config
+
+    Args:
+        rows (list[dict]): job rows
+
+    Returns:
+        list[dict]: one row per config with the mean and std of its seeds' rolling means. Configs
+        whose every seed ran its full budget come first (best mean first), then the stopped
+        or failed ones (flagged by their status)
+    """
+    groups = {}
+    for row in rows:
+        groups.setdefault(row['config'], []).append(row)
+
+    results = []
+    for configId, jobs in sorted(groups.items()):
+        counted = [job for job in jobs if job['status'] != 'failed']
+        means = [job['rollingMean'] for job in counted]
+        statuses = {job['status'] for job in jobs}
+        results.append({
+            'config': configId,
+            **{name: value for name, value in jobs[0].items() if name in AGENT_PARAMS or name in TRAINER_PARAMS},
+            'status': 'failed' if 'failed' in statuses else 'stopped' if 'stopped' in statuses else 'done',
+            'seeds': len(jobs),
+            'finished': sum(job['status'] == 'done' for job in jobs),
+            'steps': round(statistics.fmean(job['steps'] for job in counted)) if counted else 0,
+            'rollingMean': statistics.fmean(means) if means else 0.0,
+            'rollingStd': statistics.stdev(means) if len(means) > 1 else 0.0,
+            'meanScore': statistics.fmean(job['meanScore'] for job in counted) if counted else 0.0,
+            'record': max((job['record'] for job in counted), default=0)
+        })
+
+    results.sort(key=lambda row: (row['status'] == 'done', row['rollingMean']), reverse=True)
+    return results
+
+
+def printResults(rows):
+    if not rows:
+        return
+    print(' | '.join(rows[0]))
+    for row in rows:
+        print(' | '.join(str(round(value, 4)) if isinstance(value, float) else str(value) for value in row.values()))
+
+
+## PRIVATE ##
+
+def _quantile(values, q):
+    """q-th quantile (0-1) of sorted values, interpolated between neighbours
+    """
+    position = q * (len(values) - 1)
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Run a hyperparameter sweep of headless training jobs')
+    parser.add_argument('spec', help='sweep spec as a JSON file or string: {"grid": {...}} or {"random": {...}, "samples": n}')
+    parser.add_argument('--steps', type=int, default=50_000, help='env step budget per job')
+    parser.add_argument('--workers', type=int, default=None, help='pool processes (default: CPU count)')
+    parser.add_argument('--seeds', type=int, default=1, help='jobs per config, each with its own seed')
+    parser.add_argument('--base-seed', type=int, default=0, help='first seed, every config runs on the same seeds')
+    parser.add_argument('--window', type=int, default=100, help='games in the rolling score window')
+    parser.add_argument('--rungs', type=int, default=RUNGS, help='early stopping checks per job')
+    parser.add_argument('--min-rung', type=int, default=MIN_RUNG, help='first check that can stop a config')
+    parser.add_argument('--min-peers', type=int, default=MIN_PEERS, help='configs needed at a check before it can stop one')
+    parser.add_argument('--stop-quantile', type=float, default=STOP_QUANTILE,
+                        help='stop configs whose mean is below this quantile of all configs (0-1)')
+    parser.add_argument('--no-stopping', action='store_true', help='run every job to its full budget')
+    parser.add_argument('--out', default=None, help='write the per-job table here (.csv, or JSON lines otherwise)')
+    parser.add_argument('--config-out', default=None, help='write the per-config table here (.csv, or JSON lines otherwise)')
+    args = parser.parse_args()
+
+    if os.path.exists(args.spec):
+        with open(args.spec) as file:
+            spec = json.load(file)
+    else:
+        spec = json.loads(args.spec)
+
+    configs = specConfigs(spec)
+    print(len(configs), 'configs x', args.seeds, 'seeds,', args.steps, 'steps each')
+    rows = runSweep(configs, args.steps, args.workers, args.seeds, args.base_seed, args.window,
+                    rungs=args.rungs, min_rung=args.rungs + 1 if args.no_stopping else args.min_rung,
+                    min_peers=args.min_peers, stop_quantile=args.stop_quantile)
+    configRows = configResults(rows)
+    print('Jobs:')
+    printResults(rows)
+    print('Configs (over', args.seeds, 'seeds):')
+    printResults(configRows)
+
+    from metrics import MetricsSink
+    for path, table in [(args.out, rows), (args.config_out, configRows)]:
+        if path:
+            sink = MetricsSink(path)
+            for row in table:
+                sink.write(row)
+            sink.close()
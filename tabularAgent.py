@@ -0,0 +1,151 @@
+import os
+import random
+import numpy as np
+import torch
+from checkpoint import atomicSave
+from model import MODEL_FORMAT
+from featurizer import getState
+from replayMemory import ReplayMemory
+
+MAX_MEM = 100_000
+BATCH_SIZE = 1000
+
+LEARN_RATE = 0.1
+
+RANDOMNESS = 100
+RAND_DECAY = 0.5
+
+
+class QTable:
+    """Q values for every state and action. The state is 11 binary features,
+    so the whole value function fits in a 2048x3 table.
+    """
+
+    def __init__(self, state_size=11, num_actions=3, learning_rate=LEARN_RATE, gamma=0.9) -> None:
+
+        self.learningRate = learning_rate
+        self.gamma = gamma
+
+        self.table = np.zeros((2 ** state_size, num_actions), dtype=np.float32)
+        self.bitValues = 1 << np.arange(state_size) # feature i is bit i of a state's row
+
+    def codes(self, states):
+        """Row index of each state (works for one state or a batch)
+        """
+        return np.dot(np.asarray(states, dtype=np.int64), self.bitValues)
+
+    def update(self, states, actions, rewards, next_states, game_overs):
+        """Q-learning update for a batch of transitions, all at once
+
+        Args:
+            states (array (n, 11)): the states of the game
+            actions (array (n,)): the action took each step [0=straight, 1=right, 2=left]
+            rewards (array (n,)): the reward for each action
+            next_states (array (n, 11)): the next states of the game
+            game_overs (array (n,)): whether or not the game ended
+
+        Returns:
+            array of float: absolute TD error of each transition
+        """
+        rows = self.codes(states)
+        nextRows = self.codes(next_states)
+        actions = np.asarray(actions, dtype=np.int64)
+
+        # new Q = reward + gamma * max(next Q value), just the reward on game over
+        newQ = np.where(game_overs, rewards, rewards + self.gamma * self.table[nextRows].max(axis=1))
+        tdErrors = newQ - self.table[rows, actions]
+
+        # Step each (state, action) pair toward the mean TD error of its duplicates in the batch
+        cells = rows * self.table.shape[1] + actions
+        errorSums = np.bincount(cells, weights=tdErrors, minlength=self.table.size)
+        counts = np.bincount(cells, minlength=self.table.size)
+        np.divide(errorSums, counts, out=errorSums, where=counts > 0)
+        self.table += (self.learningRate * errorSums).reshape(self.table.shape).astype(np.float32)
+
+        return np.abs(tdErrors)
+
+    def state_dict(self):
+        """Table as a tensor (shares memory), same interface as Linear_QNet so
+        checkpoint.Checkpointer can save either
+        """
+        return {'table': torch.from_numpy(self.table)}
+
+    def load_state_dict(self, state_dict):
+        self.table[:] = state_dict['table'].numpy()
+
+    def checkpoint(self):
+        """Header (format version, table shape) plus the state_dict, like Linear_QNet.checkpoint
+        """
+        return {
+            'format': MODEL_FORMAT,
+            'stateSize': int(np.log2(self.table.shape[0])),
+            'numActions': self.table.shape[1],
+            'state_dict': self.state_dict()
+        }
+
+    def save(self, file_name='qtable.pth'):
+        atomicSave(self.checkpoint(), os.path.join('./model', file_name))
+
+
+class TabularAgent:
+    """Drop-in alternative to Agent for baselines: same interface, but learns a
+    QTable with vectorized updates instead of training Linear_QNet.
+    """
+
+    def __init__(self, load_model:bool, model_filename, gamma=0.9) -> None:
+        """Initializes the agent's default parameters
+
+        Args:
+            load_model (bool): Whether to load the table saved as model_filename in the model/ dir
+            model_filename (str): File name of the table in the model/ dir
+            gamma (float, optional): discount rate (<1). Defaults to 0.9.
+        """
+        self.num_games = 0
+        self.model_path = model_filename
+        self.epsilon = 0 # randomness
+        self.gamma = gamma
+        self.memory = ReplayMemory(MAX_MEM)
+
+        self.randmove = 0 # num of rand moves
+
+        self.model = QTable(gamma=gamma)
+        self.loaded_model = load_model
+        if load_model:
+            checkpoint = torch.load('./model/' + self.model_path, weights_only=True)
+            self.model.load_state_dict(checkpoint.get('state_dict', checkpoint)) # older files are a bare state_dict
+
+    def getState(self, game):
+        """Gets the game's current state (see featurizer.getState)
+        """
+        return getState(game)
+
+    def remember(self, state, action, reward, next_state, game_over):
+        """Stores the transition in memory
+        """
+        self.memory.append(state, action, reward, next_state, game_over)
+
+    def trainLongMem(self):
+        """Updates the table from a random batch of memory
+        """
+        states, actions, rewards, next_states, game_overs = self.memory.sample(BATCH_SIZE)
+        self.model.update(states.numpy(), actions.numpy(), rewards.numpy(), next_states.numpy(), game_overs.numpy())
+
+    def trainShortMem(self, state, action, reward, next_state, game_over):
+        """Updates the table from the last step
+        """
+        self.model.update([state], [action], [reward], [next_state], [game_over])
+
+    def getAction(self, state):
+        """Determines the move for the current step in the game. Either random, or
+        the best move in the table, with the same epsilon schedule as Agent
+
+        Returns:
+            int: The action to be performed this step [0=straight, 1=right, 2=left]
+        """
+        self.epsilon = RANDOMNESS - self.num_games * RAND_DECAY
+
+        if random.randint(0, 200) < self.epsilon:
+            self.randmove += 1
+            return random.randint(0, 2)
+
+        return int(np.argmax(self.model.table[self.model.codes(state)]))
@@ -0,0 +1,66 @@
+import random
+import numpy as np
+import torch
+from agent import Agent, AgentTrainer
+from checkpoint import Checkpointer, loadSnapshot, saveSnapshot
+from gameHeadless import HeadlessSnakeGame
+from metrics import TrainingMetrics
+from modelManager import loadRegistry
+
+# Run with "python -m pytest"
+
+SCORE = 3
+
+
+class ScoringGame(HeadlessSnakeGame):
+    """Every step ends a game worth SCORE, so each game's score is known
+    """
+
+    def playStep(self, action=None):
+        super().playStep(action)
+        return 10, True, SCORE
+
+
+def makeTrainer(prioritized=False, **checkpointer):
+    random.seed(0)
+    np.random.seed(0)
+    torch.manual_seed(0)
+    agent = Agent(False, 'test.pth', prioritized=prioritized, max_mem=100, batch_size=8, seed=0)
+    return AgentTrainer(agent, ScoringGame(), 'test.pth', metrics=TrainingMetrics(verbose=False),
+                        checkpointer=Checkpointer('test.pth', on_record=False, on_exit=False, **checkpointer))
+
+
+def test_snapshotRoundTrip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    trainer = makeTrainer(snapshot_every=1) # the last snapshot holds the last game
+    for _ in range(4):
+        trainer.train()
+    trainer.close()
+
+    resumed = makeTrainer(prioritized=True)
+    loadSnapshot(resumed, 'test.pth')
+    saveSnapshot(resumed, 'test.pth') # swaps out the folder it was just loaded from
+    resumed.close()
+
+    assert resumed.agent.num_games == trainer.agent.num_games == 4
+    assert resumed.totalScore == trainer.totalScore == 4 * SCORE
+    assert resumed.record == SCORE
+    assert resumed.steps == 4
+    assert resumed.agent.memory.size == 4
+    assert not isinstance(resumed.agent.memory.states, np.memmap)
+    assert not isinstance(resumed.agent.memory.tree.tree, np.memmap)
+    for parameter, expected in zip(resumed.agent.model.parameters(), trainer.agent.model.parameters()):
+        assert torch.equal(parameter, expected)
+
+
+def test_registryStatsIncludeLastGame(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    trainer = makeTrainer(every_games=1)
+    for _ in range(3):
+        trainer.train()
+    trainer.close()
+
+    entry = loadRegistry()['test.pth']
+    assert entry['games'] == 3
+    assert entry['record'] == SCORE
+    assert entry['meanScore'] == SCORE
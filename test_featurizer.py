@@ -0,0 +1,54 @@
+import random
+import numpy as np
+import pytest
+from agent import Agent
+from featurizer import getState, getBatchStates
+from gameHeadless import HeadlessSnakeGame, Point, BLOCK_SIZE
+from gameNumpy import BatchSnakeGame
+
+# Run with "python -m pytest"
+
+
+def test_getStateMatchesReference():
+    random.seed(0)
+    agent = Agent(False, 'test.pth', max_mem=10)
+    game = HeadlessSnakeGame()
+
+    for _ in range(20_000):
+        assert np.array_equal(getState(game), agent.getStateReference(game))
+        reward, gameOver, score = game.playStep(random.randrange(3))
+        if gameOver:
+            game.reset()
+
+
+def test_batchGameMatchesHeadless():
+    """One batched game and a headless game played with the same moves (the headless
+    fruit is moved to the batched one's, they use different random sources)
+    """
+    rng = np.random.default_rng(0)
+    batch = BatchSnakeGame(1, seed=0)
+    game = HeadlessSnakeGame(batch.width * BLOCK_SIZE, batch.height * BLOCK_SIZE)
+
+    def syncFruit():
+        fruit = int(batch.fruit[0])
+        game.fruit = Point(fruit % batch.width * BLOCK_SIZE, fruit // batch.width * BLOCK_SIZE)
+
+    syncFruit()
+    for _ in range(50_000):
+        assert np.array_equal(getBatchStates(batch)[0], getState(game))
+
+        action = int(rng.integers(3))
+        rewards, dones, scores = batch.step([action])
+        reward, gameOver, score = game.playStep(action)
+        assert (rewards[0], dones[0], scores[0]) == (reward, gameOver, score)
+
+        if gameOver:
+            game.reset()
+        syncFruit()
+
+
+def test_getStateRejectsOtherBlockSizes():
+    game = HeadlessSnakeGame()
+    game.blockSize = 30 # like game.Game
+    with pytest.raises(ValueError):
+        getState(game)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from metrics import RollingWindow, QuantileSketch, MetricsSink, TrainingMetrics, readMetrics
+
+# Run with "python -m pytest"
+
+
+def test_rollingWindowMatchesNumpy():
+    rng = np.random.default_rng(0)
+    window = RollingWindow(50)
+    values = rng.exponential(10.0, size=1234) # several laps, ending mid-lap
+
+    for count, value in enumerate(values, 1):
+        window.add(value)
+        last = values[max(count - 50, 0):count]
+        assert len(window) == len(last)
+        assert window.mean() == pytest.approx(last.mean(), rel=1e-9)
+    assert window.max() == last.max()
+    assert window.percentile(90) == pytest.approx(np.percentile(last, 90))
+
+
+def test_emptyRollingWindow():
+    window = RollingWindow(10)
+    assert (len(window), window.mean(), window.max(), window.percentile(50)) == (0, 0.0, 0.0, 0.0)
+
+
+def test_quantileSketchWithinRelativeAccuracy():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([np.zeros(500), rng.integers(1, 80, size=5000), rng.lognormal(3.0, 1.5, size=5000)])
+    rng.shuffle(values)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    assert sketch.count == len(values) and sketch.zeros == 500
+    for q in (0, 1, 5, 25, 50, 75, 90, 99, 100):
+        # The sketch answers with the value at the lower rank, as np.percentile's 'lower' method does
+        expected = np.percentile(values, q, method='lower')
+        assert sketch.percentile(q) == pytest.approx(expected, rel=0.01)
+
+
+def test_quantileSketchZerosAndEmpty():
+    sketch = QuantileSketch()
+    assert sketch.percentile(50) == 0.0
+    for value in (0, 0, 0, 5):
+        sketch.add(value)
+    assert sketch.percentile(50) == 0.0
+    assert sketch.percentile(100) == pytest.approx(5, rel=0.01)
+
+
+def test_summaryWithoutLoss(tmp_path, capsys):
+    path = tmp_path / 'metrics.csv'
+    metrics = TrainingMetrics(window=2, report_every=float('inf'), sink=MetricsSink(str(path)))
+    for games, score in enumerate((1, 4, 2), 1):
+        metrics.onGame(score, games, 10 * games, 0)
+
+    summary = metrics.summary()
+    assert summary['loss'] is None and summary['meanLoss'] is None
+    assert (summary['record'], summary['meanScore'], summary['windowMean']) == (4, pytest.approx(7 / 3, abs=1e-4), 3.0)
+
+    metrics.close()
+    assert 'Loss n/a' in capsys.readouterr().out
+    rows = readMetrics(str(path))
+    assert len(rows) == 1 and rows[0]['loss'] is None and rows[0]['games'] == 3
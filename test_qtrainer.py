@@ -0,0 +1,88 @@
+import copy
+import numpy as np
+import torch
+import torch.nn as nn
+from model import Linear_QNet, QTrainer
+
+# Run with "python -m pytest"
+
+GAMMA = 0.9
+LEARN_RATE = 0.001
+
+
+def makeBatch(size=64, seed=0):
+    """A random batch of transitions with a mix of finished and ongoing games
+    """
+    rng = np.random.default_rng(seed)
+    states = rng.integers(0, 2, size=(size, 11)).astype(np.float32)
+    actions = rng.integers(0, 3, size=size)
+    rewards = rng.choice([-10.0, 0.0, 10.0], size=size).astype(np.float32)
+    nextStates = rng.integers(0, 2, size=(size, 11)).astype(np.float32)
+    gameOvers = rng.random(size) < 0.3
+    if size > 1:
+        gameOvers[:2] = [True, False] # both kinds, whatever the seed
+    return states, actions, rewards, nextStates, gameOvers
+
+
+def referenceStep(model, states, actions, rewards, next_states, game_overs):
+    """One optimizer step with the targets written row by row (what trainStep vectorizes)
+    """
+    optimizer = torch.optim.Adam(model.parameters(), lr=LEARN_RATE)
+    states = torch.tensor(states)
+    prediction = model(states)
+
+    target = prediction.detach().clone()
+    with torch.no_grad():
+        for i in range(len(game_overs)):
+            newQ = float(rewards[i])
+            if not game_overs[i]:
+                newQ = float(rewards[i]) + GAMMA * torch.max(model(torch.tensor(next_states[i]))).item()
+            target[i][actions[i]] = newQ
+
+    optimizer.zero_grad()
+    nn.MSELoss()(target, prediction).backward()
+    optimizer.step()
+
+
+def test_trainStepMatchesReferenceLoop():
+    torch.manual_seed(0)
+    model = Linear_QNet(11, 256, 3)
+    reference = copy.deepcopy(model)
+    batch = makeBatch()
+
+    QTrainer(model, LEARN_RATE, GAMMA).trainStep(*batch)
+    referenceStep(reference, *batch)
+
+    for (name, parameter), expected in zip(model.named_parameters(), reference.parameters()):
+        assert torch.allclose(parameter, expected, atol=1e-6), name
+
+
+def test_oneHotAndIndexActionsAgree():
+    torch.manual_seed(0)
+    model = Linear_QNet(11, 256, 3)
+    oneHotModel = copy.deepcopy(model)
+    states, actions, rewards, nextStates, gameOvers = makeBatch()
+    oneHot = np.eye(3, dtype=np.int64)[actions]
+
+    tdErrors = QTrainer(model, LEARN_RATE, GAMMA).trainStep(states, actions, rewards, nextStates, gameOvers)
+    oneHotErrors = QTrainer(oneHotModel, LEARN_RATE, GAMMA).trainStep(states, oneHot, rewards, nextStates, gameOvers)
+
+    assert tdErrors.shape == (len(actions),)
+    assert torch.allclose(tdErrors, oneHotErrors)
+    for parameter, expected in zip(model.parameters(), oneHotModel.parameters()):
+        assert torch.equal(parameter, expected)
+
+
+def test_singleTransition():
+    torch.manual_seed(0)
+    model = Linear_QNet(11, 256, 3)
+    reference = copy.deepcopy(model)
+    states, actions, rewards, nextStates, gameOvers = makeBatch(1)
+
+    tdErrors = QTrainer(model, LEARN_RATE, GAMMA).trainStep(states[0], int(actions[0]), float(rewards[0]),
+                                                            nextStates[0], bool(gameOvers[0]))
+    referenceStep(reference, states, actions, rewards, nextStates, gameOvers)
+
+    assert tdErrors.shape == (1,)
+    for parameter, expected in zip(model.parameters(), reference.parameters()):
+        assert torch.allclose(parameter, expected, atol=1e-6)
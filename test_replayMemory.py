@@ -0,0 +1,80 @@
+import numpy as np
+from replayMemory import ReplayMemory, PrioritizedReplayMemory, SumTree
+
+# Run with "python -m pytest"
+
+
+def transitions(count, rng):
+    return (rng.integers(0, 2, size=(count, 11)), rng.integers(0, 3, size=count),
+            rng.choice([-10.0, 0.0, 10.0], size=count), rng.integers(0, 2, size=(count, 11)),
+            rng.random(count) < 0.1)
+
+
+def test_oneHotActionsAreStoredAsIndices():
+    for memory in (ReplayMemory(10, seed=0), PrioritizedReplayMemory(10, seed=0)):
+        state = np.zeros(11)
+        memory.append(state, [0, 1, 0], 0.0, state, False)
+        memory.append(state, 2, 0.0, state, False)
+        memory.appendBatch(np.zeros((2, 11)), np.eye(3, dtype=int)[[2, 0]], np.zeros(2), np.zeros((2, 11)),
+                           np.zeros(2, dtype=bool))
+        assert memory.actions[:4].tolist() == [1, 2, 2, 0]
+
+
+def test_sumTreeUpdateChangesTotal():
+    tree = SumTree(5)
+    tree.update([0, 1, 2], [1.0, 2.0, 3.0])
+    assert tree.total() == 6.0
+    tree.update([1], [0.5])
+    assert tree.total() == 4.5
+    assert tree.get(np.array([0, 1, 2])).tolist() == [1.0, 0.5, 3.0]
+    # Cumulative ranges: [0, 1) -> 0, [1, 1.5) -> 1, [1.5, 4.5) -> 2
+    assert tree.find([0.0, 0.99, 1.0, 1.49, 1.5, 4.4]).tolist() == [0, 0, 1, 1, 2, 2]
+
+
+def test_samplingTracksPriorities():
+    memory = PrioritizedReplayMemory(4, alpha=1.0, epsilon=0.0, seed=0)
+    memory.appendBatch(*transitions(4, np.random.default_rng(0)))
+    priorities = np.array([1.0, 2.0, 3.0, 4.0])
+    memory.updatePriorities(np.arange(4), priorities)
+
+    counts = np.zeros(4)
+    for _ in range(2000):
+        indices = memory.sample(10)[5]
+        counts += np.bincount(indices, minlength=4)
+    assert np.allclose(counts / counts.sum(), priorities / priorities.sum(), atol=0.01)
+
+
+def test_importanceSamplingWeights():
+    memory = PrioritizedReplayMemory(4, alpha=1.0, beta=0.5, beta_increment=0.1, epsilon=0.0, seed=0)
+    memory.appendBatch(*transitions(4, np.random.default_rng(0)))
+    memory.updatePriorities(np.arange(4), np.array([1.0, 2.0, 3.0, 4.0]))
+
+    *_, indices, weights = memory.sample(8)
+    probabilities = memory.tree.get(indices) / memory.tree.total()
+    expected = (4 * probabilities) ** -0.5
+    assert np.allclose(weights.numpy(), expected / expected.max(), atol=1e-6)
+    assert weights.max() == 1.0
+    assert memory.beta == 0.6 # annealed once per sample call
+
+
+def test_wraparoundOverwritesOldest():
+    for memory in (ReplayMemory(4, seed=0), PrioritizedReplayMemory(4, seed=0)):
+        state = np.zeros(11)
+        for reward in range(6):
+            memory.append(state, 0, float(reward), state, False)
+        assert len(memory) == 4
+        assert memory.position == 2
+        assert memory.rewards.tolist() == [4.0, 5.0, 2.0, 3.0] # slots 0 and 1 held the two oldest
+
+        memory.appendBatch(np.zeros((3, 11)), np.zeros(3), np.array([6.0, 7.0, 8.0]), np.zeros((3, 11)),
+                           np.zeros(3, dtype=bool))
+        assert memory.rewards.tolist() == [8.0, 5.0, 6.0, 7.0]
+        assert memory.position == 1
+
+
+def test_newTransitionsGetMaxPriority():
+    memory = PrioritizedReplayMemory(4, alpha=1.0, epsilon=0.0, seed=0)
+    memory.appendBatch(*transitions(2, np.random.default_rng(0)))
+    memory.updatePriorities(np.array([0]), np.array([5.0]))
+    memory.append(np.zeros(11), 0, 0.0, np.zeros(11), False)
+    assert memory.tree.get(np.array([2]))[0] == 5.0
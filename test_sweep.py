@@ -0,0 +1,41 @@
+from sweep import isLosing, configResults
+
+# Run with "python -m pytest"
+
+
+def test_isLosingOnlyStopsTheBottomQuantile():
+    scores = {0: [1.0, 1.2], 1: [0.8, 1.0], 2: [0.9, 0.7], 3: [0.1, 0.3]}
+    assert isLosing(scores, 3)
+    assert not any(isLosing(scores, config) for config in (0, 1, 2))
+
+
+def test_isLosingJudgesConfigsNotSeeds():
+    # Config 0 has one unlucky seed, but its mean is fine
+    scores = {0: [0.0, 2.0], 1: [0.9, 0.9], 2: [0.8, 0.8], 3: [0.2, 0.2]}
+    assert not isLosing(scores, 0)
+    assert isLosing(scores, 3)
+
+
+def test_isLosingNeedsPeersAndDifferences():
+    assert not isLosing({0: [0.0], 1: [1.0]}, 0, min_peers=4)
+    assert not isLosing({config: [0.5] for config in range(4)}, 0)
+
+
+def test_configResultsRanksFinishedConfigsFirst():
+    def job(config, seed, status, rolling_mean, steps=1000):
+        return {'job': 2 * config + seed, 'config': config, 'seed': seed, 'learning_rate': 0.001 * (config + 1),
+                'status': status, 'steps': steps, 'games': 10, 'record': 2, 'meanScore': rolling_mean,
+                'rollingMean': rolling_mean, 'stoppedAt': None, 'seconds': 1.0}
+
+    rows = [job(0, 0, 'done', 1.0), job(0, 1, 'done', 2.0),
+            job(1, 0, 'stopped', 5.0, 300), job(1, 1, 'stopped', 5.0, 300),
+            job(2, 0, 'done', 3.0), job(2, 1, 'failed', 0.0)]
+    results = configResults(rows)
+
+    assert [row['config'] for row in results] == [0, 1, 2]
+    assert results[0]['status'] == 'done' and results[0]['finished'] == 2
+    assert results[0]['rollingMean'] == 1.5
+    assert abs(results[0]['rollingStd'] - 0.7071) < 1e-4
+    assert results[0]['learning_rate'] == 0.001
+    assert results[1]['status'] == 'stopped' and results[1]['steps'] == 300
+    assert results[2]['status'] == 'failed' and results[2]['rollingMean'] == 3.0
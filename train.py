@@ -0,0 +1,125 @@
+import argparse
+import time
+from agent import Agent, AgentTrainer
+from tabularAgent import TabularAgent
+from checkpoint import Checkpointer, hasSnapshot, loadSnapshot
+from metrics import TrainingMetrics, MetricsSink
+from profiler import PhaseProfiler
+from gameHeadless import HeadlessSnakeGame
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description='Train a SnakeAI agent in a tight loop, without a window')
+    parser.add_argument('--model', default='model.pth', help='file name in the model/ dir to save to (or load from)')
+    parser.add_argument('--load', action='store_true', help='continue training the saved model')
+    parser.add_argument('--steps', type=int, default=None, help='stop after this many env steps')
+    parser.add_argument('--games', type=int, default=None, help='stop after this many games')
+    parser.add_argument('--prioritized', action='store_true', help='use prioritized experience replay')
+    parser.add_argument('--backend', choices=['qnet', 'tabular'], default='qnet', help='learn Linear_QNet or a Q table')
+    parser.add_argument('--train-every', type=int, default=0, help='env steps between long memory updates (0: game over only)')
+    parser.add_argument('--updates-per-train', type=int, default=1, help='long memory updates per train call')
+    parser.add_argument('--warmup', type=int, default=0, help='env steps before training starts')
+    parser.add_argument('--no-short-mem', action='store_true', help='skip the single step update every frame')
+    parser.add_argument('--save-every', type=int, default=0, help='also checkpoint every N games (0: only on record)')
+    parser.add_argument('--no-save-on-record', action='store_true', help="don't checkpoint when a game beats the record")
+    parser.add_argument('--no-save-on-exit', action='store_true', help="don't checkpoint when training stops")
+    parser.add_argument('--keep-last', type=int, default=0, help='keep the last K numbered checkpoints as well')
+    parser.add_argument('--snapshot-every', type=int, default=0, help='save a full training snapshot every N games')
+    parser.add_argument('--snapshot-on-exit', action='store_true', help='save a full training snapshot when training stops')
+    parser.add_argument('--resume', action='store_true', help='resume from the model\'s training snapshot (optimizer, games, memory)')
+    parser.add_argument('--render', action='store_true', help='draw the game in a pyglet window')
+    parser.add_argument('--render-every', type=int, default=1, help='env steps between drawn frames')
+    parser.add_argument('--plot', action='store_true', help='show a live score plot (drawn in its own process)')
+    parser.add_argument('--plot-every', type=float, default=1.0, help='min seconds between plot redraws')
+    parser.add_argument('--metrics-file', default=None, help='write training summaries here (.csv, or JSON lines otherwise)')
+    parser.add_argument('--metrics-every', type=float, default=10.0, help='seconds between training summaries')
+    parser.add_argument('--metrics-window', type=int, default=100, help='games in the rolling score window')
+    parser.add_argument('--profile', action='store_true', help='time each phase of a training step, print a summary at the end')
+    parser.add_argument('--profile-every', type=int, default=10_000, help='steps per profile window (p50/p99 printed per window)')
+    parser.add_argument('--profile-trace', default=None, help='also write a Chrome trace JSON of the profile here')
+    parser.add_argument('--report-every', type=float, default=10.0, help='seconds between throughput stats')
+    return parser.parse_args()
+
+
+def makeGame(render:bool):
+    """Creates the game to train on. Only imports pyglet when a window is wanted
+    """
+    if render:
+        from gamePyglet import SnakeGame
+        return SnakeGame()
+    return HeadlessSnakeGame()
+
+
+def run(trainer:AgentTrainer, steps=None, games=None, render_every=None, report_every=10.0):
+    """Trains until the step or game budget is used up
+
+    Args:
+        trainer (AgentTrainer): trainer holding the agent and the game
+        steps (int, optional): max env steps. Defaults to None (no limit).
+        games (int, optional): max games. Defaults to None (no limit).
+        render_every (int, optional): env steps between drawn frames, the game must be a window. Defaults to None.
+        report_every (float, optional): seconds between throughput stats. Defaults to 10.0.
+
+    Returns:
+        int: env steps played
+    """
+    game = trainer.game
+    step = 0
+    start = lastReport = time.perf_counter()
+    lastStep = 0
+
+    while (steps is None or step < steps) and (games is None or trainer.agent.num_games < games):
+        trainer.train()
+        step += 1
+
+        # Draw a frame on demand
+        if render_every and step % render_every == 0:
+            game.dispatch_events()
+            game.on_draw()
+            game.flip()
+            if game.kill or game.has_exit:
+                break
+
+        now = time.perf_counter()
+        if now - lastReport >= report_every:
+            print('Steps', step, 'Steps/s', round((step - lastStep) / (now - lastReport)),
+                  'Games', trainer.agent.num_games, 'Record', trainer.record)
+            lastReport, lastStep = now, step
+
+    elapsed = time.perf_counter() - start
+    print('Done:', step, 'steps,', trainer.agent.num_games, 'games in', round(elapsed, 1), 's',
+          '(' + str(round(step / max(elapsed, 1e-9))), 'steps/s)')
+    return step
+
+
+if __name__ == "__main__":
+
+    args = parseArgs()
+
+    if args.backend == 'tabular':
+        agent = TabularAgent(args.load, args.model)
+    else:
+        agent = Agent(args.load, args.model, prioritized=args.prioritized)
+    game = makeGame(args.render)
+    checkpointer = Checkpointer(args.model, not args.no_save_on_record, args.save_every, not args.no_save_on_exit, args.keep_last,
+                                args.snapshot_every, args.snapshot_on_exit)
+    dashboard = None
+    if args.plot:
+        from helper import LiveDashboard
+        dashboard = LiveDashboard(args.plot_every)
+    sink = MetricsSink(args.metrics_file) if args.metrics_file else None
+    metrics = TrainingMetrics(args.metrics_window, args.metrics_every, sink)
+    profiler = PhaseProfiler(args.profile_every, args.profile_trace) if args.profile or args.profile_trace else None
+    trainer = AgentTrainer(agent, game, args.model, args.train_every, args.updates_per_train, args.warmup, not args.no_short_mem,
+                           checkpointer, dashboard, metrics, profiler)
+    if args.resume:
+        if hasSnapshot(args.model):
+            loadSnapshot(trainer, args.model)
+            print('Resumed at game', agent.num_games, 'with', len(agent.memory), 'transitions in memory')
+        else:
+            print('No snapshot for', args.model + ', starting fresh')
+
+    try:
+        run(trainer, args.steps, args.games, args.render_every if args.render else None, args.report_every)
+    finally:
+        trainer.close()